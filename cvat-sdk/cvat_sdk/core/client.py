@@ -50,6 +50,13 @@ class Config:
     cache_dir: Path = attrs.field(converter=Path, default=_DEFAULT_CACHE_DIR)
     """Directory in which to store cached server data"""
 
+    durable_cache_writes: bool = True
+    """
+    Whether to update cached metadata files atomically. Disabling this makes cache updates
+    faster, but an interrupted update can leave a file truncated; such files are
+    detected and downloaded again the next time they are needed.
+    """
+
 
 class Client:
     """
@@ -30,24 +30,34 @@ def filter_dict(
 
 
 @overload
-def atomic_writer(path: Union[os.PathLike, str], mode: Literal["wb"]) -> ContextManager[BinaryIO]:
+def atomic_writer(
+    path: Union[os.PathLike, str], mode: Literal["wb"], *, buffering: int = -1
+) -> ContextManager[BinaryIO]:
     ...
 
 
 @overload
 def atomic_writer(
-    path: Union[os.PathLike, str], mode: Literal["w"], encoding: str = "UTF-8"
+    path: Union[os.PathLike, str],
+    mode: Literal["w"],
+    encoding: str = "UTF-8",
+    *,
+    buffering: int = -1,
 ) -> ContextManager[TextIO]:
     ...
 
 
 @contextlib.contextmanager
 def atomic_writer(
-    path: Union[os.PathLike, str], mode: Literal["w", "wb"], encoding: str = "UTF-8"
+    path: Union[os.PathLike, str],
+    mode: Literal["w", "wb"],
+    encoding: str = "UTF-8",
+    *,
+    buffering: int = -1,
 ) -> Iterator[IO]:
     """
     Returns a context manager that, when entered, returns a handle to a temporary
-    file opened with the specified `mode` and `encoding`. If the context manager
+    file opened with the specified `mode`, `encoding` and `buffering`. If the context manager
     is exited via an exception, the temporary file is deleted. If the context manager
     is exited normally, the file is renamed to `path`.
 
@@ -63,9 +73,9 @@ def atomic_writer(
 
         try:
             if mode == "w":
-                tmp_file = open(tmp_path, "xt", encoding=encoding)
+                tmp_file = open(tmp_path, "xt", encoding=encoding, buffering=buffering)
             elif mode == "wb":
-                tmp_file = open(tmp_path, "xb")
+                tmp_file = open(tmp_path, "xb", buffering=buffering)
             else:
                 raise ValueError(f"Unsupported mode: {mode!r}")
 
@@ -76,7 +86,7 @@ def atomic_writer(
     try:
         with tmp_file:
             yield tmp_file
-        os.rename(tmp_path, path)
+        os.replace(tmp_path, path)
     except:
         os.unlink(tmp_path)
         raise
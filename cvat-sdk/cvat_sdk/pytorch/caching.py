@@ -3,20 +3,44 @@
 # SPDX-License-Identifier: MIT
 
 import base64
+import functools
 import json
+import mmap
+import os
 import shutil
+import threading
+import uuid
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from enum import Enum, auto
 from pathlib import Path
-from typing import Callable, Mapping, Type, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 import cvat_sdk.models as models
-from cvat_sdk.api_client.model_utils import OpenApiModel, to_json
+from cvat_sdk.api_client.model_utils import ModelNormal, OpenApiModel, to_json
 from cvat_sdk.core.client import Client
 from cvat_sdk.core.proxies.projects import Project
 from cvat_sdk.core.proxies.tasks import Task
 from cvat_sdk.core.utils import atomic_writer
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class UpdatePolicy(Enum):
     """
@@ -40,41 +64,201 @@ class UpdatePolicy(Enum):
 _ModelType = TypeVar("_ModelType", bound=OpenApiModel)
 
 
+class _TaskPaths(NamedTuple):
+    task_dir: Path
+    task_json_path: Path
+    chunk_dir: Path
+
+
+class _ProjectPaths(NamedTuple):
+    project_dir: Path
+    project_json_path: Path
+
+
+_MMAP_THRESHOLD = 1 << 20
+"""Cached JSON files of at least this size are memory-mapped instead of read"""
+
+_CHUNK_WRITE_BUFFER_SIZE = 4 * 2**20
+
+_NUM_DOWNLOAD_THREADS = 4
+
+_TRASH_DIR_SUFFIX = ".trash-"
+
+
+def _model_to_json(obj: Any) -> Any:
+    """
+    A faster equivalent of to_json for the kinds of models stored in the cache.
+
+    Unlike to_json, it converts each model in a single pass, instead of
+    converting it with model_to_dict first and then walking the result again.
+    """
+
+    if obj is None or isinstance(obj, (str, int, float)):
+        return obj
+    elif isinstance(obj, ModelNormal):
+        attribute_map = obj.attribute_map
+        try:
+            return {
+                attribute_map[attr]: _model_to_json(value)
+                for attr, value in obj._data_store.items()
+            }
+        except KeyError:
+            # additional properties need special handling
+            return to_json(obj)
+    elif isinstance(obj, list):
+        return [_model_to_json(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {key: _model_to_json(value) for key, value in obj.items()}
+    elif isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    else:
+        return to_json(obj)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_server_dir_name(host: str) -> str:
+    # Base64-encode the name to avoid FS-unsafe characters (like slashes)
+    return base64.urlsafe_b64encode(host.encode()).rstrip(b"=").decode()
+
+
 class CacheManager(metaclass=ABCMeta):
     def __init__(self, client: Client) -> None:
         self._client = client
         self._logger = client.logger
+        self._durable_writes = client.config.durable_cache_writes
+
+        self._server_dir_name = _get_server_dir_name(client.api_map.host)
 
-        self._server_dir = client.config.cache_dir / f"servers/{self.server_dir_name}"
+        self._server_dir = client.config.cache_dir / f"servers/{self._server_dir_name}"
+        self._tasks_dir = self._server_dir / "tasks"
+        self._tasks_dir_str = os.fspath(self._tasks_dir)
+        self._projects_dir = self._server_dir / "projects"
+
+        self._task_paths: Dict[int, _TaskPaths] = {}
+        self._project_paths: Dict[int, _ProjectPaths] = {}
 
     @property
     def server_dir_name(self) -> str:
-        # Base64-encode the name to avoid FS-unsafe characters (like slashes)
-        return base64.urlsafe_b64encode(self._client.api_map.host.encode()).rstrip(b"=").decode()
+        return self._server_dir_name
+
+    def _get_task_paths(self, task_id: int) -> _TaskPaths:
+        paths = self._task_paths.get(task_id)
+        if paths is None:
+            task_dir = self._tasks_dir / str(task_id)
+            paths = _TaskPaths(
+                task_dir=task_dir,
+                task_json_path=task_dir / "task.json",
+                chunk_dir=task_dir / "chunks",
+            )
+            self._task_paths[task_id] = paths
+
+        return paths
+
+    def _get_project_paths(self, project_id: int) -> _ProjectPaths:
+        paths = self._project_paths.get(project_id)
+        if paths is None:
+            project_dir = self._projects_dir / str(project_id)
+            paths = _ProjectPaths(
+                project_dir=project_dir,
+                project_json_path=project_dir / "project.json",
+            )
+            self._project_paths[project_id] = paths
+
+        return paths
 
     def task_dir(self, task_id: int) -> Path:
-        return self._server_dir / f"tasks/{task_id}"
+        return self._get_task_paths(task_id).task_dir
 
     def task_json_path(self, task_id: int) -> Path:
-        return self.task_dir(task_id) / "task.json"
+        return self._get_task_paths(task_id).task_json_path
 
     def chunk_dir(self, task_id: int) -> Path:
-        return self.task_dir(task_id) / "chunks"
+        return self._get_task_paths(task_id).chunk_dir
 
     def project_dir(self, project_id: int) -> Path:
-        return self._server_dir / f"projects/{project_id}"
+        return self._get_project_paths(project_id).project_dir
 
     def project_json_path(self, project_id: int) -> Path:
-        return self.project_dir(project_id) / "project.json"
+        return self._get_project_paths(project_id).project_json_path
 
-    def load_model(self, path: Path, model_type: Type[_ModelType]) -> _ModelType:
+    def _chunk_path(self, task_id: int, chunk_index: int) -> str:
+        # This is called for every chunk, so avoid constructing Path objects.
+        return os.path.join(self._tasks_dir_str, str(task_id), "chunks", f"{chunk_index}.zip")
+
+    def _list_cached_chunks(self, task_id: int) -> Set[int]:
+        # List the chunk directory once, rather than checking each chunk separately.
+        # The result is not kept between calls, since the cache may be changed
+        # by other processes in the meantime.
+        cached_chunks = set()
+        try:
+            with os.scandir(self.chunk_dir(task_id)) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext == ".zip" and stem.isdigit() and entry.is_file():
+                        cached_chunks.add(int(stem))
+        except FileNotFoundError:
+            pass
+
+        return cached_chunks
+
+    def _is_chunk_cached(self, task_id: int, chunk_index: int) -> bool:
+        return os.path.exists(self._chunk_path(task_id, chunk_index))
+
+    def _load_json(self, path: Path) -> Any:
         with open(path, "rb") as f:
-            return model_type._new_from_openapi_data(**json.load(f))
+            if orjson and os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+                # Parse large files straight from the page cache,
+                # without copying them into a userspace buffer first.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+
+                    with memoryview(mm) as buf:
+                        data = orjson.loads(buf)
+            else:
+                # Reading the whole file up front and parsing the buffer is much faster
+                # than letting the decoder pull data through the file object.
+                buf = f.read()
+                data = orjson.loads(buf) if orjson else json.loads(buf)
+
+        return data
+
+    def load_model(self, path: Path, model_type: Type[_ModelType]) -> _ModelType:
+        return model_type._new_from_openapi_data(**self._load_json(path))
+
+    def _serialize_model(self, model: OpenApiModel) -> bytes:
+        # The cache files are not meant to be read by humans, so use the compact format.
+        if orjson:
+            return orjson.dumps(_model_to_json(model), option=orjson.OPT_APPEND_NEWLINE)
+        else:
+            return json.dumps(_model_to_json(model), separators=(",", ":")).encode("UTF-8") + b"\n"
+
+    def _write_model(self, path: Path, payload: bytes) -> None:
+        if self._durable_writes:
+            with atomic_writer(path, "wb") as f:
+                f.write(payload)
+        else:
+            with open(path, "wb") as f:
+                f.write(payload)
 
     def save_model(self, path: Path, model: OpenApiModel) -> None:
-        with atomic_writer(path, "w", encoding="UTF-8") as f:
-            json.dump(to_json(model), f, indent=4)
-            print(file=f)  # add final newline
+        self._write_model(path, self._serialize_model(model))
+
+    def update_model(self, path: Path, model: OpenApiModel) -> None:
+        """
+        Same as save_model, but leaves the file untouched if it already
+        contains the same data.
+        """
+
+        payload = self._serialize_model(model)
+
+        try:
+            if path.read_bytes() == payload:
+                return
+        except OSError:
+            pass
+
+        self._write_model(path, payload)
 
     @abstractmethod
     def retrieve_task(self, task_id: int) -> Task:
@@ -95,12 +279,58 @@ class CacheManager(metaclass=ABCMeta):
     def ensure_chunk(self, task: Task, chunk_index: int) -> None:
         ...
 
+    def ensure_chunks(self, task: Task, chunk_indexes: Iterable[int]) -> None:
+        """
+        Same as calling ensure_chunk for each index, but downloads
+        the missing chunks concurrently.
+        """
+
+        cached_chunks = self._list_cached_chunks(task.id)
+        missing_chunks = [
+            chunk_index for chunk_index in sorted(chunk_indexes) if chunk_index not in cached_chunks
+        ]
+        if not missing_chunks:
+            return
+
+        with ThreadPoolExecutor(_NUM_DOWNLOAD_THREADS) as pool:
+
+            def ensure_chunk(chunk_index):
+                self.ensure_chunk(task, chunk_index)
+
+            for _ in pool.map(ensure_chunk, missing_chunks):
+                # just need to loop through all results so that any exceptions are propagated
+                pass
+
     @abstractmethod
     def retrieve_project(self, project_id: int) -> Project:
         ...
 
 
 class _CacheManagerOnline(CacheManager):
+    def __init__(self, client: Client) -> None:
+        super().__init__(client)
+
+        # Create the top-level directories up front,
+        # so that per-task/project directories can be created without parents=True.
+        self._tasks_dir.mkdir(parents=True, exist_ok=True)
+        self._projects_dir.mkdir(parents=True, exist_ok=True)
+
+        # Purges that were interrupted, e.g. by killing the process,
+        # leave their trash directories behind, so they are removed here.
+        leftover_trash_dirs = list(self._tasks_dir.glob(f"*{_TRASH_DIR_SUFFIX}*"))
+        if leftover_trash_dirs:
+            self._remove_dirs_in_background(leftover_trash_dirs)
+
+    @staticmethod
+    def _remove_dirs_in_background(dirs: List[Path]) -> None:
+        # The thread is not a daemon, so that the interpreter
+        # waits for the deletion to finish before exiting.
+        def remove_dirs():
+            for dir in dirs:
+                shutil.rmtree(dir, ignore_errors=True)
+
+        threading.Thread(target=remove_dirs).start()
+
     def retrieve_task(self, task_id: int) -> Task:
         self._logger.info(f"Fetching task {task_id}...")
         task = self._client.tasks.retrieve(task_id)
@@ -108,27 +338,61 @@ class _CacheManagerOnline(CacheManager):
         self._initialize_task_dir(task)
         return task
 
+    def _purge_task_dir(self, task_id: int) -> None:
+        task_dir = self.task_dir(task_id)
+
+        # Deleting a large cache can take a while, so just move it out of the way
+        # and delete it in the background.
+        trash_dir = task_dir.with_name(f"{task_dir.name}{_TRASH_DIR_SUFFIX}{uuid.uuid4().hex}")
+        os.rename(task_dir, trash_dir)
+
+        self._remove_dirs_in_background([trash_dir])
+
     def _initialize_task_dir(self, task: Task) -> None:
         task_dir = self.task_dir(task.id)
         task_json_path = self.task_json_path(task.id)
 
+        # Whether the cache is stale is decided by the update date saved in task.json.
+        self._purge_task_dir_if_stale(task)
+
+        task_dir.mkdir(exist_ok=True)
+
+        # task.json also gets the task's update date as its modification time.
+        # If they match, the file most likely has the current contents already,
+        # so it's not serialized and compared again. The time is only a hint,
+        # because it can be changed by other tools.
+        updated_date_ns = round(task.updated_date.timestamp() * 1_000_000) * 1000
+
+        try:
+            is_written = os.stat(task_json_path).st_mtime_ns == updated_date_ns
+        except OSError:
+            is_written = False
+
+        if not is_written:
+            self.update_model(task_json_path, task._model)
+            os.utime(task_json_path, ns=(updated_date_ns, updated_date_ns))
+
+    def _purge_task_dir_if_stale(self, task: Task) -> None:
+        task_dir = self.task_dir(task.id)
+        task_json_path = self.task_json_path(task.id)
+
         try:
-            saved_task = self.load_model(task_json_path, models.TaskRead)
+            # Only the update date is needed here, so don't bother constructing a model.
+            saved_updated_date = datetime.fromisoformat(
+                self._load_json(task_json_path)["updated_date"]
+            )
         except Exception:
             self._logger.info(f"Task {task.id} is not yet cached or the cache is corrupted")
 
             # If the cache was corrupted, the directory might already be there; clear it.
             if task_dir.exists():
-                shutil.rmtree(task_dir)
+                self._purge_task_dir(task.id)
         else:
-            if saved_task.updated_date < task.updated_date:
+            if saved_updated_date < task.updated_date:
                 self._logger.info(
                     f"Task {task.id} has been updated on the server since it was cached; purging the cache"
                 )
-                shutil.rmtree(task_dir)
-
-        task_dir.mkdir(exist_ok=True, parents=True)
-        self.save_model(task_json_path, task._model)
+                self._purge_task_dir(task.id)
 
     def ensure_task_model(
         self,
@@ -158,13 +422,14 @@ class _CacheManagerOnline(CacheManager):
         return model
 
     def ensure_chunk(self, task: Task, chunk_index: int) -> None:
-        chunk_path = self.chunk_dir(task.id) / f"{chunk_index}.zip"
-        if chunk_path.exists():
+        if self._is_chunk_cached(task.id, chunk_index):
             return  # already downloaded previously
 
         self._logger.info(f"Downloading chunk #{chunk_index}...")
 
-        with atomic_writer(chunk_path, "wb") as chunk_file:
+        with atomic_writer(
+            self._chunk_path(task.id, chunk_index), "wb", buffering=_CHUNK_WRITE_BUFFER_SIZE
+        ) as chunk_file:
             task.download_chunk(chunk_index, chunk_file, quality="original")
 
     def retrieve_project(self, project_id: int) -> Project:
@@ -172,21 +437,42 @@ class _CacheManagerOnline(CacheManager):
         project = self._client.projects.retrieve(project_id)
 
         project_dir = self.project_dir(project_id)
-        project_dir.mkdir(parents=True, exist_ok=True)
+        project_dir.mkdir(exist_ok=True)
         project_json_path = self.project_json_path(project_id)
 
         # There are currently no files cached alongside project.json,
         # so we don't need to check if we need to purge them.
 
-        self.save_model(project_json_path, project._model)
+        self.update_model(project_json_path, project._model)
 
         return project
 
 
 class _CacheManagerOffline(CacheManager):
+    def __init__(self, client: Client) -> None:
+        super().__init__(client)
+
+        self._loaded_models: Dict[Path, Tuple[int, OpenApiModel]] = {}
+        """Maps paths of cached files to their modification times and loaded models"""
+
+    def _load_model_memoized(self, path: Path, model_type: Type[_ModelType]) -> _ModelType:
+        # The modification time is a part of the key, so that the model
+        # is reloaded if the file is updated by another process.
+        mtime_ns = os.stat(path).st_mtime_ns
+
+        loaded = self._loaded_models.get(path)
+        if loaded is not None and loaded[0] == mtime_ns:
+            return loaded[1]
+
+        model = self.load_model(path, model_type)
+        self._loaded_models[path] = (mtime_ns, model)
+        return model
+
     def retrieve_task(self, task_id: int) -> Task:
         self._logger.info(f"Retrieving task {task_id} from cache...")
-        return Task(self._client, self.load_model(self.task_json_path(task_id), models.TaskRead))
+        return Task(
+            self._client, self._load_model_memoized(self.task_json_path(task_id), models.TaskRead)
+        )
 
     def ensure_task_model(
         self,
@@ -200,15 +486,14 @@ class _CacheManagerOffline(CacheManager):
         return self.load_model(self.task_dir(task_id) / filename, model_type)
 
     def ensure_chunk(self, task: Task, chunk_index: int) -> None:
-        chunk_path = self.chunk_dir(task.id) / f"{chunk_index}.zip"
-
-        if not chunk_path.exists():
+        if not self._is_chunk_cached(task.id, chunk_index):
             raise FileNotFoundError(f"Chunk {chunk_index} of task {task.id} is not cached")
 
     def retrieve_project(self, project_id: int) -> Project:
         self._logger.info(f"Retrieving project {project_id} from cache...")
         return Project(
-            self._client, self.load_model(self.project_json_path(project_id), models.ProjectRead)
+            self._client,
+            self._load_model_memoized(self.project_json_path(project_id), models.ProjectRead),
         )
 
 
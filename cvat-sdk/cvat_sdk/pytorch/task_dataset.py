@@ -6,7 +6,6 @@ import collections
 import os
 import types
 import zipfile
-from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict, Mapping, Optional
 
 import PIL.Image
@@ -18,8 +17,6 @@ import cvat_sdk.models as models
 from cvat_sdk.pytorch.caching import UpdatePolicy, make_cache_manager
 from cvat_sdk.pytorch.common import FrameAnnotations, Target, UnsupportedDatasetError
 
-_NUM_DOWNLOAD_THREADS = 4
-
 
 class TaskVisionDataset(torchvision.datasets.VisionDataset):
     """
@@ -110,20 +107,13 @@ class TaskVisionDataset(torchvision.datasets.VisionDataset):
         self._logger.info("Downloading chunks...")
 
         self._chunk_dir = cache_manager.chunk_dir(task_id)
-        self._chunk_dir.mkdir(exist_ok=True, parents=True)
+        self._chunk_dir.mkdir(exist_ok=True)
 
         needed_chunks = {
             index // self._task.data_chunk_size for index in self._active_frame_indexes
         }
 
-        with ThreadPoolExecutor(_NUM_DOWNLOAD_THREADS) as pool:
-
-            def ensure_chunk(chunk_index):
-                cache_manager.ensure_chunk(self._task, chunk_index)
-
-            for _ in pool.map(ensure_chunk, sorted(needed_chunks)):
-                # just need to loop through all results so that any exceptions are propagated
-                pass
+        cache_manager.ensure_chunks(self._task, needed_chunks)
 
         self._logger.info("All chunks downloaded")
 
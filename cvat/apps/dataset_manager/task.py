@@ -353,6 +353,10 @@ class JobAnnotation:
 
         if deleted_shapes:
             self._set_updated_date()
+            # The job updated date must reflect any annotation changes,
+            # it is used to check if a task backup is up to date.
+            # Job.save() is not used, because it also creates a commit record
+            models.Job.objects.filter(id=self.db_job.id).update(updated_date=timezone.now())
 
     def delete(self, data=None):
         self._delete(data)
@@ -3,30 +3,35 @@
 #
 # SPDX-License-Identifier: MIT
 
-import io
+import fcntl
+import functools
+import hashlib
 import os
 from enum import Enum
 import re
 import shutil
+import sys
 import tempfile
-from typing import Any, Dict, Iterable
+import time
+from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
 import uuid
-from zipfile import ZipFile
-from datetime import datetime
+from zipfile import BadZipFile, ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
 from tempfile import mkstemp
 
 import django_rq
+from rq.job import JobStatus
+import orjson
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers, status
-from rest_framework.parsers import JSONParser
-from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
 from django_sendfile import sendfile
-from distutils.util import strtobool
 
 import cvat.apps.dataset_manager as dm
 from cvat.apps.engine import models
@@ -34,7 +39,7 @@ from cvat.apps.engine.log import slogger
 from cvat.apps.engine.serializers import (AttributeSerializer, DataSerializer,
     LabeledDataSerializer, SegmentSerializer, SimpleJobSerializer, TaskReadSerializer,
     ProjectReadSerializer, ProjectFileSerializer, TaskFileSerializer)
-from cvat.apps.engine.utils import av_scan_paths, process_failed_job, configure_dependent_job
+from cvat.apps.engine.utils import av_scan_paths, process_failed_job, configure_dependent_job, strtobool
 from cvat.apps.engine.models import (
     StorageChoice, StorageMethodChoice, DataChoice, Task, Project, Location,
     CloudStorage as CloudStorageModel)
@@ -47,27 +52,63 @@ from cvat.apps.engine.location import StorageType, get_location_configuration
 
 class Version(Enum):
     V1 = '1.0'
+    # The annotations are stored per job,
+    # data files can refer to other files with the same contents
+    V1_1 = '1.1'
+
+_COPY_BUFFER_SIZE = 1024 * 1024
+_UPLOAD_COPY_BUFFER_SIZE = 4 * 1024 * 1024
+_DUPLICATE_FILE_PREFIX_SIZE = 64 * 1024
+
+# A comment that marks an empty archive member as a copy of another member
+_DUPLICATE_FILE_COMMENT_PREFIX = b'duplicate-of:'
+
+def _dump_json(data):
+    # DRF's encoder is used for the few types orjson doesn't support natively
+    # (e.g. generators and lazy translation strings)
+    return orjson.dumps(data, default=JSONEncoder().default, option=orjson.OPT_NON_STR_KEYS)
+
+def _make_meta_zinfo(arcname):
+    # Media files are usually compressed already, so they are stored as is,
+    # while the JSON metadata is compressed with a fast compression level.
+    zinfo = ZipInfo(arcname, date_time=time.localtime()[:6])
+    zinfo.compress_type = ZIP_DEFLATED
+    # ZipFile.open() has no public way to set the level. ZipInfo uses
+    # __slots__, and the attribute is called compress_level since Python 3.13.
+    if hasattr(zinfo, 'compress_level'):
+        zinfo.compress_level = 1
+    else:
+        zinfo._compresslevel = 1
+    return zinfo
 
 
 def _get_label_mapping(db_labels):
-    label_mapping = {db_label.id: db_label.name for db_label in db_labels}
+    # db_labels are expected to have attributes prefetched, see _get_db_labels_for_mapping()
+    label_mapping = {}
     for db_label in db_labels:
         label_mapping[db_label.id] = {
             'value': db_label.name,
-            'attributes': {},
+            'attributes': {
+                db_attribute.id: db_attribute.name
+                for db_attribute in db_label.attributespec_set.all()
+            },
         }
-        for db_attribute in db_label.attributespec_set.all():
-            label_mapping[db_label.id]['attributes'][db_attribute.id] = db_attribute.name
 
     return label_mapping
 
+def _get_db_labels_for_mapping(db_labels):
+    return db_labels.only('id', 'name').prefetch_related(
+        Prefetch('attributespec_set',
+            queryset=models.AttributeSpec.objects.only('id', 'name', 'label_id'))
+    )
+
 class _BackupBase():
     def __init__(self, *args, logger=None, **kwargs):
         super().__init__(*args, **kwargs)
         self._logger = logger
 
     def _prepare_meta(self, allowed_keys, meta):
-        keys_to_drop = set(meta.keys()) - allowed_keys
+        keys_to_drop = meta.keys() - allowed_keys
         if keys_to_drop:
             if self._logger:
                 self._logger.warning('the following keys are dropped {}'.format(keys_to_drop))
@@ -107,7 +148,9 @@ class _BackupBase():
 
 class _TaskBackupBase(_BackupBase):
     MANIFEST_FILENAME = 'task.json'
-    ANNOTATIONS_FILENAME = 'annotations.json'
+    ANNOTATIONS_FILENAME = 'annotations.json' # Version.V1 only
+    ANNOTATIONS_DIRNAME = 'annotations'
+    JOB_ANNOTATIONS_FILENAME_TEMPLATE = 'job_{}.json'
     DATA_DIRNAME = 'data'
     TASK_DIRNAME = 'task'
 
@@ -150,166 +193,342 @@ class _TaskBackupBase(_BackupBase):
         }
         return self._prepare_meta(allowed_fields, job)
 
-    def _prepare_annotations(self, annotations, label_mapping):
-        allowed_fields = {
-            'label',
-            'label_id',
-            'type',
-            'occluded',
-            'outside',
-            'z_order',
-            'points',
-            'rotation',
-            'frame',
-            'group',
-            'source',
-            'attributes',
-            'shapes',
-            'elements',
-        }
+    ANNOTATION_ALLOWED_FIELDS = frozenset({
+        'label',
+        'label_id',
+        'type',
+        'occluded',
+        'outside',
+        'z_order',
+        'points',
+        'rotation',
+        'frame',
+        'group',
+        'source',
+        'attributes',
+        'shapes',
+        'elements',
+    })
 
-        def _update_attribute(attribute, label):
-            if 'name' in attribute:
-                source, dest = attribute.pop('name'), 'spec_id'
-            else:
-                source, dest = attribute.pop('spec_id'), 'name'
-            attribute[dest] = label_mapping[label]['attributes'][source]
+    def _prepare_annotations(self, annotations, label_mapping):
+        allowed_fields = self.ANNOTATION_ALLOWED_FIELDS
+
+        # Flatten the mapping once, so that the lookups
+        # for every shape and attribute are single-level
+        label_values = {}
+        label_attributes = {}
+        for label, mapping in label_mapping.items():
+            label_values[label] = mapping['value']
+            label_attributes[label] = mapping['attributes']
+
+        def _update_attributes(attributes, label):
+            attribute_mapping = label_attributes[label]
+            for attribute in attributes:
+                if 'name' in attribute:
+                    source, dest = attribute.pop('name'), 'spec_id'
+                else:
+                    source, dest = attribute.pop('spec_id'), 'name'
+                attribute[dest] = attribute_mapping[source]
 
         def _update_label(shape, parent_label=''):
             if 'label_id' in shape:
                 source = shape.pop('label_id')
-                shape['label'] = label_mapping[source]['value']
+                shape['label'] = label_values[source]
             elif 'label' in shape:
                 source = parent_label + shape.pop('label')
-                shape['label_id'] = label_mapping[source]['value']
+                shape['label_id'] = label_values[source]
 
             return source
 
-        def _prepare_shapes(shapes, parent_label=''):
-            for shape in shapes:
-                label = _update_label(shape, parent_label)
-                for attr in shape['attributes']:
-                    _update_attribute(attr, label)
-
-                _prepare_shapes(shape.get('elements', []), label)
+        for tag in annotations['tags']:
+            label = _update_label(tag)
+            _update_attributes(tag['attributes'], label)
+            self._prepare_meta(allowed_fields, tag)
 
-                self._prepare_meta(allowed_fields, shape)
+        # Skeleton elements are processed with an explicit stack instead of recursion
+        shapes = [(shape, '') for shape in annotations['shapes']]
+        while shapes:
+            shape, parent_label = shapes.pop()
+            label = _update_label(shape, parent_label)
+            _update_attributes(shape['attributes'], label)
 
-        def _prepare_tracks(tracks, parent_label=''):
-            for track in tracks:
-                label = _update_label(track, parent_label)
-                for shape in track['shapes']:
-                    for attr in shape['attributes']:
-                        _update_attribute(attr, label)
-                    self._prepare_meta(allowed_fields, shape)
+            shapes.extend((element, label) for element in shape.get('elements', []))
 
-                _prepare_tracks(track.get('elements', []), label)
+            self._prepare_meta(allowed_fields, shape)
 
-                for attr in track['attributes']:
-                    _update_attribute(attr, label)
-                self._prepare_meta(allowed_fields, track)
+        tracks = [(track, '') for track in annotations['tracks']]
+        while tracks:
+            track, parent_label = tracks.pop()
+            label = _update_label(track, parent_label)
+            for shape in track['shapes']:
+                _update_attributes(shape['attributes'], label)
+                self._prepare_meta(allowed_fields, shape)
 
-        for tag in annotations['tags']:
-            label = _update_label(tag)
-            for attr in tag['attributes']:
-                _update_attribute(attr, label)
-            self._prepare_meta(allowed_fields, tag)
+            tracks.extend((element, label) for element in track.get('elements', []))
 
-        _prepare_shapes(annotations['shapes'])
-        _prepare_tracks(annotations['tracks'])
+            _update_attributes(track['attributes'], label)
+            self._prepare_meta(allowed_fields, track)
 
         return annotations
 
     def _get_db_jobs(self):
         if self._db_task:
-            db_segments = list(self._db_task.segment_set.all().prefetch_related('job_set'))
-            db_segments.sort(key=lambda i: i.job_set.first().id)
-            db_jobs = (s.job_set.first() for s in db_segments)
-            return db_jobs
+            return models.Job.objects.filter(segment__task=self._db_task) \
+                .select_related('segment').order_by('id')
         return ()
 
 class _ExporterBase():
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._manifest_data = None
+
+    def _get_manifest_data(self):
+        # The manifest is serialized once, when it's needed
+        # for the fingerprint, and then reused in the archive
+        if self._manifest_data is None:
+            self._manifest_data = _dump_json(self._prepare_manifest())
+        return self._manifest_data
 
     @staticmethod
-    def _write_files(source_dir, zip_object, files, target_dir):
-        for filename in files:
-            arcname = os.path.normpath(
-                os.path.join(
-                    target_dir,
-                    os.path.relpath(filename, source_dir),
-                )
+    def _make_file_zinfo(filename, arcname, file_stat=None):
+        if file_stat is None:
+            return ZipInfo.from_file(filename, arcname)
+
+        # The same as ZipInfo.from_file(), but with an already known stat result
+        zinfo = ZipInfo(arcname, time.localtime(file_stat.st_mtime)[0:6])
+        zinfo.external_attr = (file_stat.st_mode & 0xFFFF) << 16
+        zinfo.file_size = file_stat.st_size
+        return zinfo
+
+    @classmethod
+    def _write_file(cls, zip_object, filename, arcname, file_stat=None):
+        zinfo = cls._make_file_zinfo(filename, arcname, file_stat)
+        zinfo.compress_type = ZIP_STORED
+        with open(filename, 'rb') as src, zip_object.open(zinfo, 'w') as dst:
+            shutil.copyfileobj(src, dst, length=_COPY_BUFFER_SIZE)
+
+    @staticmethod
+    def _get_arcname(source_dir, filename, target_dir):
+        return os.path.normpath(
+            os.path.join(
+                target_dir,
+                os.path.relpath(filename, source_dir),
             )
-            zip_object.write(filename=filename, arcname=arcname)
-
-    def _write_directory(self, source_dir, zip_object, target_dir, recursive=True, exclude_files=None):
-        for root, dirs, files in os.walk(source_dir, topdown=True):
-            if not recursive:
-                dirs.clear()
-
-            if files:
-                self._write_files(
-                    source_dir=source_dir,
-                    zip_object=zip_object,
-                    files=(os.path.join(root, f) for f in files if not exclude_files or f not in exclude_files),
-                    target_dir=target_dir,
-                )
+        )
+
+    @classmethod
+    def _make_arcname_getter(cls, source_dir, target_dir):
+        # The prefixes are computed once, so most of the files
+        # don't need the relatively slow os.path.relpath() call
+        source_prefix = os.path.join(os.path.abspath(source_dir), '')
+        target_prefix = os.path.join(os.path.normpath(target_dir), '')
+
+        def get_arcname(filename):
+            filename = os.path.abspath(filename)
+            if filename.startswith(source_prefix):
+                return target_prefix + filename[len(source_prefix):]
+            return cls._get_arcname(source_dir, filename, target_dir)
+
+        return get_arcname
+
+    @staticmethod
+    def _update_file_digest(digest, filename, offset=0, size=None):
+        """
+        Adds the file contents from the offset to the digest,
+        up to size bytes or to the end of the file
+        """
+
+        with open(filename, 'rb') as f:
+            f.seek(offset)
+            if size is None:
+                while chunk := f.read(_COPY_BUFFER_SIZE):
+                    digest.update(chunk)
+            else:
+                digest.update(f.read(size))
+        return digest
+
+    @classmethod
+    def _find_duplicate_files(cls, files, file_stats=None):
+        # Only files of the same size can have the same contents,
+        # so the other files don't need to be read
+        files_by_size = {}
+        for filename in files:
+            if file_stats:
+                size = file_stats[filename].st_size
+            else:
+                size = os.path.getsize(filename)
+            files_by_size.setdefault(size, []).append(filename)
+
+        # Different files usually differ early, so the file beginnings are compared
+        # first, and only the files with the same beginning are read further.
+        # The beginning digest is continued to the full one, so no part
+        # of a file is read twice here.
+        duplicates = {}
+        for size, same_size_files in files_by_size.items():
+            if not size or len(same_size_files) == 1:
+                continue
+
+            files_by_prefix = {}
+            for filename in same_size_files:
+                digest = cls._update_file_digest(hashlib.blake2b(), filename,
+                    size=_DUPLICATE_FILE_PREFIX_SIZE)
+                files_by_prefix.setdefault(digest.digest(), []).append((filename, digest))
+
+            for same_prefix_files in files_by_prefix.values():
+                if len(same_prefix_files) == 1:
+                    continue
+
+                originals = {}
+                for filename, digest in same_prefix_files:
+                    if _DUPLICATE_FILE_PREFIX_SIZE < size:
+                        cls._update_file_digest(digest, filename, offset=_DUPLICATE_FILE_PREFIX_SIZE)
+
+                    original = originals.setdefault(digest.digest(), filename)
+                    if original != filename:
+                        duplicates[filename] = original
+
+        return duplicates
+
+    @classmethod
+    def _write_files(cls, source_dir, zip_object, files, target_dir, deduplicate=False,
+            file_stats=None):
+        """
+        Returns the number of files that were written as references to other files.
+
+        file_stats can map the files to their already known stat results.
+        """
+
+        duplicates = {}
+        if deduplicate:
+            files = list(files)
+            duplicates = cls._find_duplicate_files(files, file_stats)
+
+        get_arcname = cls._make_arcname_getter(source_dir, target_dir)
+        for filename in files:
+            arcname = get_arcname(filename)
+            file_stat = file_stats[filename] if file_stats else None
+
+            original = duplicates.get(filename)
+            if original:
+                zinfo = cls._make_file_zinfo(filename, arcname, file_stat)
+                zinfo.compress_type = ZIP_STORED
+                zinfo.comment = _DUPLICATE_FILE_COMMENT_PREFIX + \
+                    get_arcname(original).encode()
+                zip_object.writestr(zinfo, b'')
+            else:
+                cls._write_file(zip_object, filename, arcname, file_stat)
+
+        return len(duplicates)
+
+    def _write_directory(self, source_dir, zip_object, target_dir, recursive=True, exclude_files=None,
+            deduplicate=False):
+        # os.scandir() is used instead of os.walk() to reuse the cached stat results
+        # of the directory entries when the files are written
+        file_stats = {}
+        dirs = [source_dir]
+        while dirs:
+            subdirs = []
+            with os.scandir(dirs.pop()) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        # Like os.walk(), don't follow directory symlinks
+                        if recursive and not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    elif not exclude_files or entry.name not in exclude_files:
+                        file_stats[entry.path] = entry.stat()
+
+            # Visit the subdirectories in order
+            dirs.extend(reversed(subdirs))
+
+        return self._write_files(
+            source_dir=source_dir,
+            zip_object=zip_object,
+            files=list(file_stats),
+            target_dir=target_dir,
+            deduplicate=deduplicate,
+            file_stats=file_stats,
+        )
 
 class TaskExporter(_ExporterBase, _TaskBackupBase):
-    def __init__(self, pk, version=Version.V1):
+    def __init__(self, pk, version=Version.V1_1, *, db_task=None, label_mapping=None):
+        """
+        db_task and label_mapping can be passed if they are already available,
+        e.g. when the task is exported as a part of a project.
+        db_task is expected to have data__video selected.
+        """
+
         super().__init__(logger=slogger.task[pk])
-        self._db_task = models.Task.objects.prefetch_related('data__images').select_related('data__video').get(pk=pk)
+        if db_task is None:
+            db_task = models.Task.objects.select_related('data__video').get(pk=pk)
+        self._db_task = db_task
         self._db_data = self._db_task.data
         self._version = version
+        self._ordered_image_paths = None
+
+        if label_mapping is None:
+            db_labels = (self._db_task.project if self._db_task.project_id else self._db_task).label_set.all()
+            label_mapping = _get_label_mapping(_get_db_labels_for_mapping(db_labels))
+        self._label_mapping = label_mapping
+
+    def _get_ordered_image_paths(self):
+        # Only the paths are requested, already sorted by the DB,
+        # and only for the tasks that need them
+        if self._ordered_image_paths is None:
+            self._ordered_image_paths = list(
+                self._db_data.images.order_by('frame').values_list('path', flat=True)
+            )
+        return self._ordered_image_paths
 
-        db_labels = (self._db_task.project if self._db_task.project_id else self._db_task).label_set.all().prefetch_related(
-            'attributespec_set')
-        self._label_mapping = _get_label_mapping(db_labels)
-
-    def _write_data(self, zip_object, target_dir=None):
+    def _prepare_data_writers(self, target_dir=None):
         target_data_dir = os.path.join(target_dir, self.DATA_DIRNAME) if target_dir else self.DATA_DIRNAME
         if self._db_data.storage == StorageChoice.LOCAL:
-            self._write_directory(
+            return [functools.partial(self._write_directory,
                 source_dir=self._db_data.get_upload_dirname(),
-                zip_object=zip_object,
                 target_dir=target_data_dir,
-            )
+                deduplicate=self._version != Version.V1,
+            )]
         elif self._db_data.storage == StorageChoice.SHARE:
             data_dir = settings.SHARE_ROOT
             if hasattr(self._db_data, 'video'):
-                media_files = (os.path.join(data_dir, self._db_data.video.path), )
+                media_files = [os.path.join(data_dir, self._db_data.video.path)]
             else:
-                media_files = (os.path.join(data_dir, im.path) for im in self._db_data.images.all().order_by('frame'))
-
-            self._write_files(
-                source_dir=data_dir,
-                zip_object=zip_object,
-                files=media_files,
-                target_dir=target_data_dir,
-            )
+                media_files = [os.path.join(data_dir, path) for path in self._get_ordered_image_paths()]
 
             upload_dir = self._db_data.get_upload_dirname()
-            self._write_files(
-                source_dir=upload_dir,
-                zip_object=zip_object,
-                files=(os.path.join(upload_dir, f) for f in ('manifest.jsonl',)),
-                target_dir=target_data_dir,
-            )
+            return [
+                functools.partial(self._write_files,
+                    source_dir=data_dir,
+                    files=media_files,
+                    target_dir=target_data_dir,
+                    deduplicate=self._version != Version.V1,
+                ),
+                functools.partial(self._write_files,
+                    source_dir=upload_dir,
+                    files=[os.path.join(upload_dir, 'manifest.jsonl')],
+                    target_dir=target_data_dir,
+                ),
+            ]
         else:
             raise NotImplementedError()
 
-    def _write_task(self, zip_object, target_dir=None):
-        task_dir = self._db_task.get_dirname()
+    def _prepare_task_writers(self, target_dir=None):
         target_task_dir = os.path.join(target_dir, self.TASK_DIRNAME) if target_dir else self.TASK_DIRNAME
-        self._write_directory(
-            source_dir=task_dir,
-            zip_object=zip_object,
+        return [functools.partial(self._write_directory,
+            source_dir=self._db_task.get_dirname(),
             target_dir=target_task_dir,
             recursive=False,
-        )
+        )]
 
-    def _write_manifest(self, zip_object, target_dir=None):
+    def _prepare_media_writers(self, target_dir=None):
+        """
+        Returns the calls that write the media files to an archive. All the paths
+        are computed here, so the calls don't use the model instances or the DB
+        and can be done in another thread.
+        """
+
+        return self._prepare_data_writers(target_dir) + self._prepare_task_writers(target_dir)
+
+    def _prepare_manifest(self):
         def serialize_task():
             task_serializer = TaskReadSerializer(self._db_task)
             for field in ('url', 'owner', 'assignee', 'segments'):
@@ -322,8 +541,8 @@ class TaskExporter(_ExporterBase, _TaskBackupBase):
 
             return task
 
-        def serialize_segment(db_segment):
-            db_job = db_segment.job_set.first()
+        def serialize_segment(db_job):
+            db_segment = db_job.segment
             job_serializer = SimpleJobSerializer(db_job)
             for field in ('url', 'assignee'):
                 job_serializer.fields.pop(field)
@@ -340,15 +559,12 @@ class TaskExporter(_ExporterBase, _TaskBackupBase):
             return segment
 
         def serialize_jobs():
-            db_segments = list(self._db_task.segment_set.all())
-            db_segments.sort(key=lambda i: i.job_set.first().id)
-            return (serialize_segment(s) for s in db_segments)
+            return (serialize_segment(j) for j in self._get_db_jobs())
 
         def serialize_custom_file_mapping(db_segment: models.Segment):
             if self._db_task.mode == 'annotation':
-                files: Iterable[models.Image] = self._db_data.images.all().order_by('frame')
-                segment_files = files[db_segment.start_frame : db_segment.stop_frame + 1]
-                return {'files': list(frame.path for frame in segment_files)}
+                files = self._get_ordered_image_paths()
+                return {'files': files[db_segment.start_frame : db_segment.stop_frame + 1]}
             else:
                 assert False, (
                     "Backups with custom file mapping are not supported"
@@ -373,31 +589,109 @@ class TaskExporter(_ExporterBase, _TaskBackupBase):
         task['data'] = serialize_data()
         task['jobs'] = serialize_jobs()
 
-        target_manifest_file = os.path.join(target_dir, self.MANIFEST_FILENAME) if target_dir else self.MANIFEST_FILENAME
-        zip_object.writestr(target_manifest_file, data=JSONRenderer().render(task))
+        return task
+
+    def _serialize_annotations(self, output_file):
+        """
+        Writes the annotations of the task jobs one after another,
+        returns the sizes of the written pieces
+        """
 
-    def _write_annotations(self, zip_object, target_dir=None):
         def serialize_annotations():
-            job_annotations = []
             db_jobs = self._get_db_jobs()
             db_job_ids = (j.id for j in db_jobs)
             for db_job_id in db_job_ids:
                 annotations = dm.task.get_job_data(db_job_id)
                 annotations_serializer = LabeledDataSerializer(data=annotations)
                 annotations_serializer.is_valid(raise_exception=True)
-                job_annotations.append(self._prepare_annotations(annotations_serializer.data, self._label_mapping))
+                yield self._prepare_annotations(annotations_serializer.data, self._label_mapping)
 
-            return job_annotations
+        # Write the job annotations piece by piece,
+        # to avoid keeping the annotations of all jobs in memory.
+        sizes = []
+        for job_annotations in serialize_annotations():
+            data = _dump_json(job_annotations)
+            output_file.write(data)
+            sizes.append(len(data))
 
-        annotations = serialize_annotations()
-        target_annotations_file = os.path.join(target_dir, self.ANNOTATIONS_FILENAME) if target_dir else self.ANNOTATIONS_FILENAME
-        zip_object.writestr(target_annotations_file, data=JSONRenderer().render(annotations))
+        return sizes
+
+    @staticmethod
+    def _copy_file_part(src, dst, size):
+        while size:
+            chunk = src.read(min(size, _COPY_BUFFER_SIZE))
+            if not chunk:
+                raise EOFError()
+            dst.write(chunk)
+            size -= len(chunk)
+
+    def _write_annotations(self, zip_object, annotations_file, annotations_sizes, target_dir=None):
+        annotations_file.seek(0)
+
+        if self._version == Version.V1:
+            # All the job annotations are stored in a single JSON list
+            target_annotations_file = os.path.join(target_dir, self.ANNOTATIONS_FILENAME) \
+                if target_dir else self.ANNOTATIONS_FILENAME
+            zinfo = _make_meta_zinfo(target_annotations_file)
+            zinfo.file_size = sum(annotations_sizes) + max(len(annotations_sizes) - 1, 0) + 2
+            with zip_object.open(zinfo, 'w') as f:
+                f.write(b'[')
+                for idx, size in enumerate(annotations_sizes):
+                    if idx:
+                        f.write(b',')
+                    self._copy_file_part(annotations_file, f, size)
+                f.write(b']')
+        else:
+            target_annotations_dir = os.path.join(target_dir, self.ANNOTATIONS_DIRNAME) \
+                if target_dir else self.ANNOTATIONS_DIRNAME
+            for idx, size in enumerate(annotations_sizes):
+                zinfo = _make_meta_zinfo(os.path.join(target_annotations_dir,
+                    self.JOB_ANNOTATIONS_FILENAME_TEMPLATE.format(idx)))
+                # The size allows ZipFile to decide if ZIP64 is needed
+                zinfo.file_size = size
+                with zip_object.open(zinfo, 'w') as f:
+                    self._copy_file_part(annotations_file, f, size)
+
+    def get_fingerprint(self, digest=None):
+        """
+        Returns a digest of the DB state the backup is made of.
+        The media files are not included, because they can't be changed.
+        """
+
+        if digest is None:
+            digest = hashlib.blake2b()
+
+        digest.update(self._get_manifest_data())
+        # Annotation changes are tracked by the job updated dates
+        digest.update(_dump_json(list(
+            self._get_db_jobs().values_list('updated_date', flat=True)
+        )))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _write_media(zip_object, media_writers):
+        for write in media_writers:
+            write(zip_object=zip_object)
 
     def _export_task(self, zip_obj, target_dir=None):
-        self._write_data(zip_obj, target_dir)
-        self._write_task(zip_obj, target_dir)
-        self._write_manifest(zip_obj, target_dir)
-        self._write_annotations(zip_obj, target_dir)
+        target_manifest_file = os.path.join(target_dir, self.MANIFEST_FILENAME) if target_dir else self.MANIFEST_FILENAME
+
+        # DB requests must be done in this thread
+        media_writers = self._prepare_media_writers(target_dir)
+
+        # Copying the media is mostly file I/O, while the metadata requires
+        # DB requests and serialization, so they are prepared concurrently.
+        # ZipFile doesn't support concurrent writes, so the metadata is buffered
+        # and added to the archive after the media.
+        with tempfile.TemporaryFile(dir=settings.TMP_FILES_ROOT) as annotations_file:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                media_future = executor.submit(self._write_media, zip_obj, media_writers)
+                manifest_data = self._get_manifest_data()
+                annotations_sizes = self._serialize_annotations(annotations_file)
+                media_future.result()
+
+            zip_obj.writestr(_make_meta_zinfo(target_manifest_file), data=manifest_data)
+            self._write_annotations(zip_obj, annotations_file, annotations_sizes, target_dir)
 
     def export_to(self, file, target_dir=None):
         if self._db_task.data.storage_method == StorageMethodChoice.FILE_SYSTEM and \
@@ -405,7 +699,7 @@ class TaskExporter(_ExporterBase, _TaskBackupBase):
             raise Exception('The task cannot be exported because it does not contain any raw data')
 
         if isinstance(file, str):
-            with ZipFile(file, 'w') as zf:
+            with ZipFile(file, 'w', compression=ZIP_STORED, allowZip64=True) as zf:
                 self._export_task(zip_obj=zf, target_dir=target_dir)
         elif isinstance(file, ZipFile):
             self._export_task(zip_obj=file, target_dir=target_dir)
@@ -430,7 +724,23 @@ class _ImporterBase():
         if not os.path.exists(target_dir):
             os.makedirs(target_dir)
 
-    def _create_labels(self, labels, db_task=None, db_project=None, parent_label=None):
+    @staticmethod
+    def _bulk_create(model, db_objects, key_fields, **filters):
+        db_objects = model.objects.bulk_create(db_objects)
+
+        if db_objects and db_objects[0].pk is None:
+            # Not all DB backends return ids of bulk-created objects,
+            # so look them up by the fields that identify them
+            ids = {
+                tuple(row[:-1]): row[-1]
+                for row in model.objects.filter(**filters).values_list(*key_fields, 'pk')
+            }
+            for db_object in db_objects:
+                db_object.pk = ids[tuple(getattr(db_object, f) for f in key_fields)]
+
+        return db_objects
+
+    def _create_labels(self, labels, db_task=None, db_project=None):
         label_mapping = {}
         if db_task:
             label_relation = {
@@ -441,32 +751,64 @@ class _ImporterBase():
                 'project': db_project
             }
 
+        # Labels are created level by level, because sublabels
+        # need the ids of their parents
+        db_attributes = []
+        skeletons = []
+        sublabels_by_parent = {}
+        level = [(None, label) for label in labels]
+        while level:
+            db_labels = []
+            label_extras = []
+            for parent_label, label in level:
+                attributes = label.pop('attributes', [])
+                svg = label.pop('svg', '')
+                sublabels = label.pop('sublabels', [])
+
+                db_labels.append(models.Label(**label_relation, parent=parent_label, **label))
+                label_extras.append((attributes, svg, sublabels))
+
+            db_labels = self._bulk_create(models.Label, db_labels,
+                ('parent_id', 'name'), **label_relation)
+
+            next_level = []
+            for db_label, (attributes, svg, sublabels) in zip(db_labels, label_extras):
+                parent_label = db_label.parent
+                label_key = (parent_label.name if parent_label else '') + db_label.name
+                label_mapping[label_key] = {
+                    'value': db_label.id,
+                    'attributes': {},
+                }
+
+                if parent_label:
+                    sublabels_by_parent.setdefault(parent_label.id, []).append(db_label)
+
+                next_level.extend((db_label, sublabel) for sublabel in sublabels)
+
+                if db_label.type == str(models.LabelType.SKELETON):
+                    skeletons.append((db_label, svg))
+
+                attribute_serializer = AttributeSerializer(data=attributes, many=True)
+                attribute_serializer.is_valid(raise_exception=True)
+                db_attributes.extend(
+                    (label_key, models.AttributeSpec(label=db_label, **attribute))
+                    for attribute in attribute_serializer.validated_data
+                )
 
-        for label in labels:
-            label_name = label['name']
-            attributes = label.pop('attributes', [])
-            svg = label.pop('svg', '')
-            sublabels  = label.pop('sublabels', [])
-
-            db_label = models.Label.objects.create(**label_relation, parent=parent_label, **label)
-            label_mapping[(parent_label.name if parent_label else '') + label_name] = {
-                'value': db_label.id,
-                'attributes': {},
-            }
-
-            label_mapping.update(self._create_labels(sublabels, db_task, db_project, db_label))
+            level = next_level
 
-            if db_label.type == str(models.LabelType.SKELETON):
-                for db_sublabel in list(db_label.sublabels.all()):
-                    svg = svg.replace(f'data-label-name="{db_sublabel.name}"', f'data-label-id="{db_sublabel.id}"')
-                models.Skeleton.objects.create(root=db_label, svg=svg)
+        db_skeletons = []
+        for db_label, svg in skeletons:
+            for db_sublabel in sublabels_by_parent.get(db_label.id, []):
+                svg = svg.replace(f'data-label-name="{db_sublabel.name}"', f'data-label-id="{db_sublabel.id}"')
+            db_skeletons.append(models.Skeleton(root=db_label, svg=svg))
+        models.Skeleton.objects.bulk_create(db_skeletons)
 
-            for attribute in attributes:
-                attribute_name = attribute['name']
-                attribute_serializer = AttributeSerializer(data=attribute)
-                attribute_serializer.is_valid(raise_exception=True)
-                db_attribute = attribute_serializer.save(label=db_label)
-                label_mapping[(parent_label.name if parent_label else '') + label_name]['attributes'][attribute_name] = db_attribute.id
+        created_attributes = self._bulk_create(models.AttributeSpec,
+            [db_attribute for _, db_attribute in db_attributes],
+            ('label_id', 'name'), label_id__in={db_attribute.label_id for _, db_attribute in db_attributes})
+        for (label_key, _), db_attribute in zip(db_attributes, created_attributes):
+            label_mapping[label_key]['attributes'][db_attribute.name] = db_attribute.id
 
         return label_mapping
 
@@ -477,7 +819,7 @@ class TaskImporter(_ImporterBase, _TaskBackupBase):
         self._subdir = subdir
         self._user_id = user_id
         self._org_id = org_id
-        self._manifest, self._annotations = self._read_meta()
+        self._manifest = self._read_meta()
         self._version = self._read_version(self._manifest)
         self._labels_mapping = label_mapping
         self._db_task = None
@@ -486,10 +828,7 @@ class TaskImporter(_ImporterBase, _TaskBackupBase):
     def _read_meta(self):
         def read(zip_object):
             manifest_filename = os.path.join(self._subdir, self.MANIFEST_FILENAME) if self._subdir else self.MANIFEST_FILENAME
-            annotations_filename = os.path.join(self._subdir, self.ANNOTATIONS_FILENAME) if self._subdir else self.ANNOTATIONS_FILENAME
-            manifest = JSONParser().parse(io.BytesIO(zip_object.read(manifest_filename)))
-            annotations = JSONParser().parse(io.BytesIO(zip_object.read(annotations_filename)))
-            return manifest, annotations
+            return orjson.loads(zip_object.read(manifest_filename))
 
         if isinstance(self._file, str):
             with ZipFile(self._file, 'r') as input_file:
@@ -500,6 +839,10 @@ class TaskImporter(_ImporterBase, _TaskBackupBase):
         raise ValueError('Unsuported type of file argument')
 
     def _create_annotations(self, db_job, annotations):
+        if not any(annotations.get(k) for k in ('tags', 'shapes', 'tracks')):
+            # The job has just been created, so there is nothing to replace
+            return
+
         self._prepare_annotations(annotations, self._labels_mapping)
 
         serializer = LabeledDataSerializer(data=annotations)
@@ -523,7 +866,9 @@ class TaskImporter(_ImporterBase, _TaskBackupBase):
             if len(segment_files) != segment_size:
                 raise ValidationError(f"segment {i}: segment files do not match segment size")
 
-            segments.append(segment_files)
+            # The same names are also read from the archive, interning lets
+            # both lists share the string objects instead of keeping 2 copies
+            segments.append([sys.intern(f) for f in segment_files])
 
         return segments
 
@@ -532,21 +877,41 @@ class TaskImporter(_ImporterBase, _TaskBackupBase):
             data_path = self._db_task.data.get_upload_dirname()
             task_dirname = os.path.join(self._subdir, self.TASK_DIRNAME) if self._subdir else self.TASK_DIRNAME
             data_dirname = os.path.join(self._subdir, self.DATA_DIRNAME) if self._subdir else self.DATA_DIRNAME
+            extracted_files = {}
+
+            def extract(zinfo, target_file):
+                self._prepare_dirs(target_file)
+
+                if self._version != Version.V1 and \
+                        zinfo.comment.startswith(_DUPLICATE_FILE_COMMENT_PREFIX):
+                    original_arcname = zinfo.comment[len(_DUPLICATE_FILE_COMMENT_PREFIX):].decode()
+                    original_file = extracted_files.get(original_arcname)
+                    if not original_file:
+                        raise ValidationError(f"Can't find the original file for '{zinfo.filename}'")
+
+                    try:
+                        os.link(original_file, target_file)
+                    except OSError:
+                        shutil.copyfile(original_file, target_file)
+                else:
+                    with zip_object.open(zinfo) as src, open(target_file, "wb") as out:
+                        shutil.copyfileobj(src, out, length=_COPY_BUFFER_SIZE)
+
+                extracted_files[zinfo.filename] = target_file
+
             uploaded_files = []
-            for f in zip_object.namelist():
+            # Read the members in the order they are stored in the archive
+            for zinfo in sorted(zip_object.infolist(), key=lambda zi: zi.header_offset):
+                f = zinfo.filename
                 if f.endswith(os.path.sep):
                     continue
                 if f.startswith(data_dirname + os.path.sep):
                     target_file = os.path.join(data_path, os.path.relpath(f, data_dirname))
-                    self._prepare_dirs(target_file)
-                    with open(target_file, "wb") as out:
-                        out.write(zip_object.read(f))
-                    uploaded_files.append(os.path.relpath(f, data_dirname))
+                    extract(zinfo, target_file)
+                    uploaded_files.append(sys.intern(os.path.relpath(f, data_dirname)))
                 elif f.startswith(task_dirname + os.path.sep):
                     target_file = os.path.join(task_path, os.path.relpath(f, task_dirname))
-                    self._prepare_dirs(target_file)
-                    with open(target_file, "wb") as out:
-                        out.write(zip_object.read(f))
+                    extract(zinfo, target_file)
 
             return uploaded_files
 
@@ -614,10 +979,38 @@ class TaskImporter(_ImporterBase, _TaskBackupBase):
             db_job.status = job['status']
             db_job.save()
 
+    def _read_job_annotations(self, zip_object, job_count):
+        if self._version == Version.V1:
+            annotations_filename = os.path.join(self._subdir, self.ANNOTATIONS_FILENAME) \
+                if self._subdir else self.ANNOTATIONS_FILENAME
+            yield from orjson.loads(zip_object.read(annotations_filename))
+            return
+
+        # Each job is read only when it is imported, so only the annotations
+        # of one job are kept in memory
+        annotations_dir = os.path.join(self._subdir, self.ANNOTATIONS_DIRNAME) \
+            if self._subdir else self.ANNOTATIONS_DIRNAME
+        for idx in range(job_count):
+            annotations_filename = os.path.join(annotations_dir,
+                self.JOB_ANNOTATIONS_FILENAME_TEMPLATE.format(idx))
+            try:
+                data = zip_object.read(annotations_filename)
+            except KeyError:
+                raise ValidationError(f"Can't find the annotations of the job #{idx}")
+            yield orjson.loads(data)
+
     def _import_annotations(self):
-        db_jobs = self._get_db_jobs()
-        for db_job, annotations in zip(db_jobs, self._annotations):
-            self._create_annotations(db_job, annotations)
+        def import_annotations(zip_object):
+            db_jobs = list(self._get_db_jobs())
+            job_annotations = self._read_job_annotations(zip_object, len(db_jobs))
+            for db_job, annotations in zip(db_jobs, job_annotations):
+                self._create_annotations(db_job, annotations)
+
+        if isinstance(self._file, str):
+            with ZipFile(self._file, 'r') as input_file:
+                import_annotations(input_file)
+        else:
+            import_annotations(self._file)
 
     def import_task(self):
         self._import_task()
@@ -627,8 +1020,11 @@ class TaskImporter(_ImporterBase, _TaskBackupBase):
 @transaction.atomic
 def _import_task(filename, user, org_id):
     av_scan_paths(filename)
-    task_importer = TaskImporter(filename, user, org_id)
-    db_task = task_importer.import_task()
+
+    # Open the archive once for both reading the metadata and extracting the data
+    with ZipFile(filename, 'r') as zf:
+        task_importer = TaskImporter(zf, user, org_id)
+        db_task = task_importer.import_task()
     return db_task.id
 
 class _ProjectBackupBase(_BackupBase):
@@ -647,19 +1043,33 @@ class _ProjectBackupBase(_BackupBase):
         return self._prepare_meta(allowed_fields, project)
 
 class ProjectExporter(_ExporterBase, _ProjectBackupBase):
-    def __init__(self, pk, version=Version.V1):
+    def __init__(self, pk, version=Version.V1_1):
         super().__init__(logger=slogger.project[pk])
-        self._db_project = models.Project.objects.prefetch_related('tasks').get(pk=pk)
+        self._db_project = models.Project.objects.get(pk=pk)
         self._version = version
-
-        db_labels = self._db_project.label_set.all().prefetch_related('attributespec_set')
-        self._label_mapping = _get_label_mapping(db_labels)
+        self._task_exporters = None
+
+        db_labels = self._db_project.label_set.all()
+        self._label_mapping = _get_label_mapping(_get_db_labels_for_mapping(db_labels))
+
+    def _get_task_exporters(self):
+        # The exporters are kept, so the task manifests serialized
+        # for the fingerprint are reused in the archive
+        if self._task_exporters is None:
+            # The tasks use the project labels, so the label mapping is shared
+            db_tasks = self._db_project.tasks.select_related('data__video').order_by('id')
+            self._task_exporters = [
+                TaskExporter(db_task.id, self._version,
+                    db_task=db_task, label_mapping=self._label_mapping)
+                for db_task in db_tasks
+            ]
+        return self._task_exporters
 
     def _write_tasks(self, zip_object):
-        for idx, db_task in enumerate(self._db_project.tasks.all().order_by('id')):
-            TaskExporter(db_task.id, self._version).export_to(zip_object, self.TASKNAME_TEMPLATE.format(idx))
+        for idx, task_exporter in enumerate(self._get_task_exporters()):
+            task_exporter.export_to(zip_object, self.TASKNAME_TEMPLATE.format(idx))
 
-    def _write_manifest(self, zip_object):
+    def _prepare_manifest(self):
         def serialize_project():
             project_serializer = ProjectReadSerializer(self._db_project)
             for field in ('assignee', 'owner', 'tasks', 'url'):
@@ -675,15 +1085,31 @@ class ProjectExporter(_ExporterBase, _ProjectBackupBase):
         project = serialize_project()
         project['version'] = self._version.value
 
-        zip_object.writestr(self.MANIFEST_FILENAME, data=JSONRenderer().render(project))
+        return project
+
+    def _write_manifest(self, zip_object):
+        zip_object.writestr(_make_meta_zinfo(self.MANIFEST_FILENAME),
+            data=self._get_manifest_data())
+
+    def get_fingerprint(self):
+        """
+        Returns a digest of the DB state the backup is made of.
+        The media files are not included, because they can't be changed.
+        """
+
+        digest = hashlib.blake2b()
+        digest.update(self._get_manifest_data())
+        for task_exporter in self._get_task_exporters():
+            task_exporter.get_fingerprint(digest)
+        return digest.hexdigest()
 
     def export_to(self, filename):
-        with ZipFile(filename, 'w') as output_file:
+        with ZipFile(filename, 'w', compression=ZIP_STORED, allowZip64=True) as output_file:
             self._write_tasks(output_file)
             self._write_manifest(output_file)
 
 class ProjectImporter(_ImporterBase, _ProjectBackupBase):
-    TASKNAME_RE = r'task_(\d+)/'
+    TASKNAME_RE = re.compile(r'task_(\d+)/')
 
     def __init__(self, filename, user_id, org_id=None):
         super().__init__(logger=slogger.glob)
@@ -697,7 +1123,7 @@ class ProjectImporter(_ImporterBase, _ProjectBackupBase):
 
     def _read_meta(self):
         with ZipFile(self._filename, 'r') as input_file:
-            manifest = JSONParser().parse(io.BytesIO(input_file.read(self.MANIFEST_FILENAME)))
+            manifest = orjson.loads(input_file.read(self.MANIFEST_FILENAME))
 
         return manifest
 
@@ -719,9 +1145,12 @@ class ProjectImporter(_ImporterBase, _ProjectBackupBase):
         def get_tasks(zip_object):
             tasks = {}
             for fname in zip_object.namelist():
-                m = re.match(self.TASKNAME_RE, fname)
+                if not fname.startswith('task_'):
+                    continue
+
+                m = self.TASKNAME_RE.match(fname)
                 if m:
-                    tasks[int(m.group(1))] = m.group(0)
+                    tasks.setdefault(int(m.group(1)), m.group(0))
             return [v for _, v in sorted(tasks.items())]
 
         with ZipFile(self._filename, 'r') as zf:
@@ -748,41 +1177,133 @@ def _import_project(filename, user, org_id):
     db_project = project_importer.import_project()
     return db_project.id
 
+@functools.lru_cache(maxsize=None)
+def _get_rq_connection(queue_name):
+    # django_rq creates a new Redis client, and so a new connection pool,
+    # on each get_queue() call. A shared client reuses the connections
+    # between the requests. The pool is reset after forks by redis-py.
+    return django_rq.get_connection(queue_name)
+
+def _get_queue(queue_name):
+    return django_rq.get_queue(queue_name, connection=_get_rq_connection(queue_name))
+
+def _get_backup_fingerprint(path):
+    try:
+        with ZipFile(path, 'r') as zf:
+            return zf.comment
+    except (OSError, BadZipFile):
+        return None
+
+def _write_backup(db_instance, Exporter, output_path, logger, cache_ttl):
+    cache_dir = os.path.dirname(output_path)
+    exporter = Exporter(db_instance.id)
+
+    # The updated date also changes when fields that are not
+    # included in the backup are changed, e.g. the assignee.
+    # The archive is rebuilt only if the backed up state has changed.
+    fingerprint = exporter.get_fingerprint().encode()
+    if _get_backup_fingerprint(output_path) == fingerprint:
+        os.utime(output_path)
+    else:
+        with tempfile.TemporaryDirectory(dir=cache_dir) as temp_dir:
+            temp_file = os.path.join(temp_dir, 'dump')
+            exporter.export_to(temp_file)
+
+            with ZipFile(temp_file, 'a') as zf:
+                zf.comment = fingerprint
+
+            os.replace(temp_file, output_path)
+
+    archive_ctime = os.path.getctime(output_path)
+    scheduler = django_rq.get_scheduler(settings.CVAT_QUEUES.IMPORT_DATA.value)
+    cleaning_job = scheduler.enqueue_in(time_delta=cache_ttl,
+        func=_clear_backup_cache,
+        file_path=output_path,
+        file_ctime=archive_ctime,
+        logger=logger)
+    logger.info(
+        "The {} '{}' is backuped at '{}' "
+        "and available for downloading for the next {}. "
+        "Export cache cleaning job is enqueued, id '{}'".format(
+            "project" if isinstance(db_instance, Project) else 'task',
+            db_instance.name, output_path, cache_ttl,
+            cleaning_job.id))
+
+def _clear_backup_cache(file_path, file_ctime, logger):
+    # The lock file is removed together with the archive. The lock is taken
+    # before, so the archive can't be removed while it's being rebuilt.
+    lock_path = file_path + '.lock'
+    try:
+        lock_file = open(lock_path, 'r')
+    except FileNotFoundError:
+        clear_export_cache(file_path, file_ctime, logger)
+        return
+
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        clear_export_cache(file_path, file_ctime, logger)
+        if not os.path.exists(file_path):
+            os.remove(lock_path)
+
+def _drop_file_cache(path):
+    # The archive is not read again after it is uploaded,
+    # so it shouldn't take the page cache from other data
+    if not hasattr(os, 'posix_fadvise'):
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+# The name of the cloud storage object metadata field
+# which contains the backup fingerprint
+_BACKUP_FINGERPRINT_METADATA_KEY = 'cvat-backup-fingerprint'
+
+def _is_backup_uploaded(storage, filename, fingerprint):
+    # The check is optional, the file is uploaded if the metadata can't be read
+    try:
+        metadata = storage.get_file_metadata(filename)
+    except (ValidationError, PermissionDenied, NotFound):
+        return False
+
+    return metadata.get(_BACKUP_FINGERPRINT_METADATA_KEY) == fingerprint.decode()
+
+def _is_backup_outdated(output_path, instance_time):
+    try:
+        archive_mtime = os.path.getmtime(output_path)
+    except FileNotFoundError:
+        return True
+
+    return archive_mtime < instance_time
+
 def _create_backup(db_instance, Exporter, output_path, logger, cache_ttl):
     try:
         cache_dir = get_export_cache_dir(db_instance)
         output_path = os.path.join(cache_dir, output_path)
 
         instance_time = timezone.localtime(db_instance.updated_date).timestamp()
-        if not (os.path.exists(output_path) and \
-                instance_time <= os.path.getmtime(output_path)):
+        if _is_backup_outdated(output_path, instance_time):
             os.makedirs(cache_dir, exist_ok=True)
-            with tempfile.TemporaryDirectory(dir=cache_dir) as temp_dir:
-                temp_file = os.path.join(temp_dir, 'dump')
-                exporter = Exporter(db_instance.id)
-                exporter.export_to(temp_file)
-                os.replace(temp_file, output_path)
-
-            archive_ctime = os.path.getctime(output_path)
-            scheduler = django_rq.get_scheduler(settings.CVAT_QUEUES.IMPORT_DATA.value)
-            cleaning_job = scheduler.enqueue_in(time_delta=cache_ttl,
-                func=clear_export_cache,
-                file_path=output_path,
-                file_ctime=archive_ctime,
-                logger=logger)
-            logger.info(
-                "The {} '{}' is backuped at '{}' "
-                "and available for downloading for the next {}. "
-                "Export cache cleaning job is enqueued, id '{}'".format(
-                    "project" if isinstance(db_instance, Project) else 'task',
-                    db_instance.name, output_path, cache_ttl,
-                    cleaning_job.id))
+
+            # The export jobs are per user, so the same backup can be requested
+            # concurrently. The later jobs wait for the first one and reuse its result.
+            with open(output_path + '.lock', 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                if _is_backup_outdated(output_path, instance_time):
+                    _write_backup(db_instance, Exporter, output_path, logger, cache_ttl)
 
         return output_path
     except Exception:
         log_exception(logger)
         raise
 
+_EXPORT_PARAMS = {
+    Task: ('task', slogger.task, TaskExporter, TASK_CACHE_TTL),
+    Project: ('project', slogger.project, ProjectExporter, PROJECT_CACHE_TTL),
+}
+
 def export(db_instance, request, queue_name):
     action = request.query_params.get('action', None)
     filename = request.query_params.get('filename', None)
@@ -791,21 +1312,13 @@ def export(db_instance, request, queue_name):
         raise serializers.ValidationError(
             "Unexpected action specified for the request")
 
-    if isinstance(db_instance, Task):
-        obj_type = 'task'
-        logger = slogger.task[db_instance.pk]
-        Exporter = TaskExporter
-        cache_ttl = TASK_CACHE_TTL
-        use_target_storage_conf = request.query_params.get('use_default_location', True)
-    elif isinstance(db_instance, Project):
-        obj_type = 'project'
-        logger = slogger.project[db_instance.pk]
-        Exporter = ProjectExporter
-        cache_ttl = PROJECT_CACHE_TTL
-        use_target_storage_conf = request.query_params.get('use_default_location', True)
-    else:
+    try:
+        obj_type, loggers, Exporter, cache_ttl = _EXPORT_PARAMS[type(db_instance)]
+    except KeyError:
         raise Exception(
             "Unexpected type of db_isntance: {}".format(type(db_instance)))
+    logger = loggers[db_instance.pk]
+    use_target_storage_conf = request.query_params.get('use_default_location', True)
     use_settings = strtobool(str(use_target_storage_conf))
     obj = db_instance if use_settings else request.query_params
     location_conf = get_location_configuration(
@@ -814,26 +1327,32 @@ def export(db_instance, request, queue_name):
         field_name=StorageType.TARGET
     )
 
-    queue = django_rq.get_queue(queue_name)
+    queue = _get_queue(queue_name)
     rq_id = f"export:{obj_type}.id{db_instance.pk}-by-{request.user}"
     rq_job = queue.fetch_job(rq_id)
     if rq_job:
-        last_project_update_time = timezone.localtime(db_instance.updated_date)
+        # The request time is stored as a POSIX timestamp.
+        # The jobs which have it in another format are recreated.
         request_time = rq_job.meta.get('request_time', None)
-        if request_time is None or request_time < last_project_update_time:
+        if not isinstance(request_time, float) or \
+                request_time < db_instance.updated_date.timestamp():
             rq_job.cancel()
             rq_job.delete()
         else:
-            if rq_job.is_finished:
+            # The status is already loaded by fetch_job(), while the is_* properties
+            # request it from Redis on each access
+            rq_status = rq_job.get_status(refresh=False)
+            if rq_status == JobStatus.FINISHED:
                 file_path = rq_job.return_value
-                if action == "download" and os.path.exists(file_path):
+                file_exists = os.path.exists(file_path)
+                if action == "download" and file_exists:
                     rq_job.delete()
 
-                    timestamp = datetime.strftime(last_project_update_time,
-                        "%Y_%m_%d_%H_%M_%S")
-                    filename = filename or "{}_{}_backup_{}{}".format(
-                        obj_type, db_instance.name, timestamp,
-                        os.path.splitext(file_path)[1]).lower()
+                    if not filename:
+                        timestamp = timezone.localtime(db_instance.updated_date) \
+                            .strftime("%Y_%m_%d_%H_%M_%S")
+                        ext = os.path.splitext(file_path)[1]
+                        filename = f"{obj_type}_{db_instance.name}_backup_{timestamp}{ext}".lower()
 
                     location = location_conf.get('location')
                     if location == Location.LOCAL:
@@ -850,7 +1369,12 @@ def export(db_instance, request, queue_name):
                         storage = db_storage_to_storage_instance(db_storage)
 
                         try:
-                            storage.upload_file(file_path, filename)
+                            fingerprint = _get_backup_fingerprint(file_path)
+                            if not (fingerprint and _is_backup_uploaded(storage, filename, fingerprint)):
+                                storage.upload_file(file_path, filename, metadata={
+                                    _BACKUP_FINGERPRINT_METADATA_KEY: fingerprint.decode()
+                                } if fingerprint else None)
+                                _drop_file_cache(file_path)
                         except (ValidationError, PermissionDenied, NotFound) as ex:
                             msg = str(ex) if not isinstance(ex, ValidationError) else \
                                 '\n'.join([str(d) for d in ex.detail])
@@ -858,10 +1382,9 @@ def export(db_instance, request, queue_name):
                         return Response(status=status.HTTP_200_OK)
                     else:
                         raise NotImplementedError()
-                else:
-                    if os.path.exists(file_path):
-                        return Response(status=status.HTTP_201_CREATED)
-            elif rq_job.is_failed:
+                elif file_exists:
+                    return Response(status=status.HTTP_201_CREATED)
+            elif rq_status == JobStatus.FAILED:
                 exc_info = str(rq_job.exc_info)
                 rq_job.delete()
                 return Response(exc_info,
@@ -874,7 +1397,7 @@ def export(db_instance, request, queue_name):
         func=_create_backup,
         args=(db_instance, Exporter, '{}_backup.zip'.format(obj_type), logger, cache_ttl),
         job_id=rq_id,
-        meta={ 'request_time': timezone.localtime() },
+        meta={ 'request_time': time.time() },
         result_ttl=ttl, failure_ttl=ttl)
     return Response(status=status.HTTP_202_ACCEPTED)
 
@@ -882,16 +1405,13 @@ def export(db_instance, request, queue_name):
 def _download_file_from_bucket(db_storage, filename, key):
     storage = db_storage_to_storage_instance(db_storage)
 
-    data = storage.download_fileobj(key)
-    with open(filename, 'wb+') as f:
-        f.write(data.getbuffer())
+    storage.download_file(key, filename)
 
 def _import(importer, request, queue, rq_id, Serializer, file_field_name, location_conf, filename=None):
     rq_job = queue.fetch_job(rq_id)
 
     if not rq_job:
         org_id = getattr(request.iam_context['organization'], 'id', None)
-        fd = None
         dependent_job = None
 
         location = location_conf.get('location')
@@ -901,9 +1421,9 @@ def _import(importer, request, queue, rq_id, Serializer, file_field_name, locati
                 serializer.is_valid(raise_exception=True)
                 payload_file = serializer.validated_data[file_field_name]
                 fd, filename = mkstemp(prefix='cvat_', dir=settings.TMP_FILES_ROOT)
-                with open(filename, 'wb+') as f:
-                    for chunk in payload_file.chunks():
-                        f.write(chunk)
+                with os.fdopen(fd, 'wb') as f:
+                    payload_file.seek(0)
+                    shutil.copyfileobj(payload_file, f, length=_UPLOAD_COPY_BUFFER_SIZE)
         else:
             file_name = request.query_params.get('filename')
             assert file_name, "The filename wasn't specified"
@@ -916,6 +1436,8 @@ def _import(importer, request, queue, rq_id, Serializer, file_field_name, locati
             db_storage = get_object_or_404(CloudStorageModel, pk=storage_id)
             key = filename
             fd, filename = mkstemp(prefix='cvat_', dir=settings.TMP_FILES_ROOT)
+            # The file is written by a worker, which can't use this descriptor
+            os.close(fd)
             dependent_job = configure_dependent_job(
                 queue, rq_id, _download_file_from_bucket,
                 db_storage, filename, key)
@@ -926,19 +1448,18 @@ def _import(importer, request, queue, rq_id, Serializer, file_field_name, locati
             job_id=rq_id,
             meta={
                 'tmp_file': filename,
-                'tmp_file_descriptor': fd,
             },
             depends_on=dependent_job
         )
     else:
-        if rq_job.is_finished:
+        rq_status = rq_job.get_status(refresh=False)
+        if rq_status == JobStatus.FINISHED:
             project_id = rq_job.return_value
-            if rq_job.meta['tmp_file_descriptor']: os.close(rq_job.meta['tmp_file_descriptor'])
             os.remove(rq_job.meta['tmp_file'])
             rq_job.delete()
             return Response({'id': project_id}, status=status.HTTP_201_CREATED)
-        elif rq_job.is_failed or \
-                rq_job.is_deferred and rq_job.dependency and rq_job.dependency.is_failed:
+        elif rq_status == JobStatus.FAILED or \
+                rq_status == JobStatus.DEFERRED and rq_job.dependency and rq_job.dependency.is_failed:
             exc_info = process_failed_job(rq_job)
             # RQ adds a prefix with exception class name
             import_error_prefix = '{}.{}'.format(
@@ -953,13 +1474,20 @@ def _import(importer, request, queue, rq_id, Serializer, file_field_name, locati
 
     return Response({'rq_id': rq_id}, status=status.HTTP_202_ACCEPTED)
 
+def _get_import_rq_id(request):
+    # A status request can pass the id in the query, then the request body
+    # is not parsed. The older clients send it in the form data.
+    rq_id = request.query_params.get('rq_id')
+    if not rq_id:
+        rq_id = request.data.get('rq_id')
+    return rq_id
+
 def get_backup_dirname():
     return settings.TMP_FILES_ROOT
 
 def import_project(request, queue_name, filename=None):
-    if 'rq_id' in request.data:
-        rq_id = request.data['rq_id']
-    else:
+    rq_id = _get_import_rq_id(request)
+    if not rq_id:
         rq_id = f"import:project.{uuid.uuid4()}-by-{request.user}"
     Serializer = ProjectFileSerializer
     file_field_name = 'project_file'
@@ -969,7 +1497,7 @@ def import_project(request, queue_name, filename=None):
         field_name=StorageType.SOURCE,
     )
 
-    queue = django_rq.get_queue(queue_name)
+    queue = _get_queue(queue_name)
 
     return _import(
         importer=_import_project,
@@ -983,9 +1511,8 @@ def import_project(request, queue_name, filename=None):
     )
 
 def import_task(request, queue_name, filename=None):
-    if 'rq_id' in request.data:
-        rq_id = request.data['rq_id']
-    else:
+    rq_id = _get_import_rq_id(request)
+    if not rq_id:
         rq_id = f"import:task.{uuid.uuid4()}-by-{request.user}"
     Serializer = TaskFileSerializer
     file_field_name = 'task_file'
@@ -995,7 +1522,7 @@ def import_task(request, queue_name, filename=None):
         field_name=StorageType.SOURCE
     )
 
-    queue = django_rq.get_queue(queue_name)
+    queue = _get_queue(queue_name)
 
     return _import(
         importer=_import_task,
@@ -6,8 +6,10 @@ import os
 import boto3
 import functools
 import json
+import uuid
 
 from abc import ABC, abstractmethod, abstractproperty
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from io import BytesIO
 from rest_framework.exceptions import PermissionDenied, NotFound, ValidationError
@@ -118,6 +120,12 @@ class _CloudStorage(ABC):
     def get_file_last_modified(self, key):
         pass
 
+    @abstractmethod
+    def get_file_metadata(self, key):
+        """
+        Returns the custom metadata of the file
+        """
+
     @abstractmethod
     def initialize_content(self):
         pass
@@ -140,7 +148,7 @@ class _CloudStorage(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, file_path, file_name=None):
+    def upload_file(self, file_path, file_name=None, metadata=None):
         pass
 
     def __contains__(self, file_name):
@@ -199,6 +207,19 @@ class AWS_S3(_CloudStorage):
     transfer_config = {
         'max_io_queue': 10,
     }
+    # Big files are uploaded in parts concurrently
+    upload_transfer_config = {
+        'max_io_queue': 10,
+        'multipart_threshold': 64 * 1024 * 1024,
+        'multipart_chunksize': 16 * 1024 * 1024,
+        'max_concurrency': 16,
+    }
+    # Files are downloaded in concurrent range requests
+    download_transfer_config = {
+        'max_io_queue': 10,
+        'multipart_chunksize': 16 * 1024 * 1024,
+        'max_concurrency': 8,
+    }
 
     class Effect(str, Enum):
         ALLOW = 'Allow'
@@ -283,6 +304,11 @@ class AWS_S3(_CloudStorage):
     def get_file_last_modified(self, key):
         return self._head_file(key).get('LastModified')
 
+    @validate_file_status
+    @validate_bucket_status
+    def get_file_metadata(self, key):
+        return self._head_file(key).get('Metadata', {})
+
     @validate_bucket_status
     def upload_fileobj(self, file_obj, file_name):
         self._bucket.upload_fileobj(
@@ -292,14 +318,15 @@ class AWS_S3(_CloudStorage):
         )
 
     @validate_bucket_status
-    def upload_file(self, file_path, file_name=None):
+    def upload_file(self, file_path, file_name=None, metadata=None):
         if not file_name:
             file_name = os.path.basename(file_path)
         try:
             self._bucket.upload_file(
                 file_path,
                 file_name,
-                Config=TransferConfig(max_io_queue=self.transfer_config['max_io_queue'])
+                ExtraArgs={'Metadata': metadata} if metadata else None,
+                Config=TransferConfig(**self.upload_transfer_config)
             )
         except ClientError as ex:
             msg = str(ex)
@@ -324,6 +351,17 @@ class AWS_S3(_CloudStorage):
         buf.seek(0)
         return buf
 
+    @validate_file_status
+    @validate_bucket_status
+    def download_file(self, key, path):
+        # The file is written directly, without buffering it in memory
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.bucket.download_file(
+            Key=key,
+            Filename=path,
+            Config=TransferConfig(**self.download_transfer_config)
+        )
+
     def create(self):
         try:
             responce = self._bucket.create(
@@ -377,6 +415,7 @@ class AWS_S3(_CloudStorage):
 
 class AzureBlobContainer(_CloudStorage):
     MAX_CONCURRENCY = 3
+    MAX_UPLOAD_CONCURRENCY = 16
 
 
     class Effect:
@@ -428,6 +467,11 @@ class AzureBlobContainer(_CloudStorage):
     def get_file_last_modified(self, key):
         return self._head_file(key).last_modified
 
+    @validate_file_status
+    @validate_bucket_status
+    def get_file_metadata(self, key):
+        return self._head_file(key).metadata or {}
+
     def get_status(self):
         try:
             self._head()
@@ -452,11 +496,19 @@ class AzureBlobContainer(_CloudStorage):
     def upload_fileobj(self, file_obj, file_name):
         self._container_client.upload_blob(name=file_name, data=file_obj)
 
-    def upload_file(self, file_path, file_name=None):
+    def upload_file(self, file_path, file_name=None, metadata=None):
         if not file_name:
             file_name = os.path.basename(file_path)
+        # The file is streamed in blocks, which are uploaded concurrently
         with open(file_path, 'rb') as f:
-            self.upload_fileobj(f.read(), file_name)
+            self._container_client.upload_blob(
+                name=file_name,
+                data=f,
+                length=os.fstat(f.fileno()).st_size,
+                metadata=metadata,
+                max_concurrency=self.MAX_UPLOAD_CONCURRENCY,
+                overwrite=True,
+            )
 
     # TODO:
     # def multipart_upload(self, file_obj):
@@ -481,6 +533,19 @@ class AzureBlobContainer(_CloudStorage):
         buf.seek(0)
         return buf
 
+    @validate_file_status
+    @validate_bucket_status
+    def download_file(self, key, path):
+        # The file is written directly, without buffering it in memory
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        storage_stream_downloader = self._container_client.download_blob(
+            blob=key,
+            offset=None,
+            length=None,
+        )
+        with open(path, 'wb') as f:
+            storage_stream_downloader.download_to_stream(f, max_concurrency=self.MAX_CONCURRENCY)
+
     @property
     def supported_actions(self):
         pass
@@ -503,6 +568,12 @@ def _define_gcs_status(func):
     return wrapper
 
 class GoogleCloudStorage(_CloudStorage):
+    # Big files are uploaded in parts concurrently, and then the parts are composed.
+    # A composite object can be made of up to 32 objects.
+    MULTIPART_THRESHOLD = 64 * 1024 * 1024
+    MIN_PART_SIZE = 16 * 1024 * 1024
+    MAX_PART_COUNT = 32
+    MAX_UPLOAD_CONCURRENCY = 16
 
     class Effect:
         pass
@@ -564,15 +635,65 @@ class GoogleCloudStorage(_CloudStorage):
         buf.seek(0)
         return buf
 
+    @validate_file_status
+    @validate_bucket_status
+    def download_file(self, key, path):
+        # The file is written directly, without buffering it in memory
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = self.bucket.blob(key)
+        with open(path, 'wb') as f:
+            self._storage_client.download_blob_to_file(blob, f)
+
     @validate_bucket_status
     def upload_fileobj(self, file_obj, file_name):
         self.bucket.blob(file_name).upload_from_file(file_obj)
 
     @validate_bucket_status
-    def upload_file(self, file_path, file_name=None):
+    def upload_file(self, file_path, file_name=None, metadata=None):
         if not file_name:
             file_name = os.path.basename(file_path)
-        self.bucket.blob(file_name).upload_from_filename(file_path)
+
+        blob = self.bucket.blob(file_name)
+        blob.metadata = metadata
+
+        file_size = os.path.getsize(file_path)
+        if file_size <= self.MULTIPART_THRESHOLD:
+            blob.upload_from_filename(file_path)
+        else:
+            self._upload_file_in_parts(file_path, blob, file_size)
+
+    def _upload_file_in_parts(self, file_path, blob, file_size):
+        part_count = min(-(-file_size // self.MIN_PART_SIZE), self.MAX_PART_COUNT)
+        part_size = -(-file_size // part_count)
+        part_blobs = [
+            self.bucket.blob('{}.part-{}-{}'.format(blob.name, uuid.uuid4().hex, i))
+            for i in range(part_count)
+        ]
+
+        def upload_part(i):
+            with open(file_path, 'rb') as f:
+                f.seek(i * part_size)
+                part_blobs[i].upload_from_file(f,
+                    size=min(part_size, file_size - i * part_size))
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=min(part_count, self.MAX_UPLOAD_CONCURRENCY)
+            ) as executor:
+                # list() is used to propagate the exceptions
+                list(executor.map(upload_part, range(part_count)))
+
+            # The destination metadata is passed with the compose request
+            blob.compose(part_blobs)
+        finally:
+            for part_blob in part_blobs:
+                try:
+                    part_blob.delete()
+                except GoogleCloudNotFound:
+                    pass # the part wasn't uploaded
+                except Exception as ex:
+                    slogger.glob.warning("Failed to remove the uploaded part '{}': {}".format(
+                        part_blob.name, str(ex)))
 
     def create(self):
         try:
@@ -598,6 +719,13 @@ class GoogleCloudStorage(_CloudStorage):
         blob.reload()
         return blob.updated
 
+    @validate_file_status
+    @validate_bucket_status
+    def get_file_metadata(self, key):
+        blob = self.bucket.blob(key)
+        blob.reload()
+        return blob.metadata or {}
+
     @property
     def supported_actions(self):
         pass
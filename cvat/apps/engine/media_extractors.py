@@ -185,13 +185,17 @@ class ImageListReader(IMediaReader):
         )
 
         self._sorting_method = sorting_method
+        self._source_path_set = None
 
     def __iter__(self):
         for i in range(self._start, self._stop, self._step):
             yield (self.get_image(i), self.get_path(i), i)
 
     def __contains__(self, media_file):
-        return media_file in self._source_path
+        # the check is usually done for every file, so a set is built on the first one
+        if self._source_path_set is None:
+            self._source_path_set = frozenset(self._source_path)
+        return media_file in self._source_path_set
 
     def filter(self, callback):
         source_path = list(filter(callback, self._source_path))
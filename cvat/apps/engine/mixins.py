@@ -9,13 +9,13 @@ import uuid
 
 from django.conf import settings
 from django.core.cache import cache
-from distutils.util import strtobool
 from rest_framework import status, mixins
 from rest_framework.response import Response
 
 from cvat.apps.engine.models import Location
 from cvat.apps.engine.location import StorageType, get_location_configuration
 from cvat.apps.engine.serializers import DataSerializer, LabeledDataSerializer
+from cvat.apps.engine.utils import strtobool
 from cvat.apps.webhooks.signals import signal_update, signal_create, signal_delete
 
 class TusFile:
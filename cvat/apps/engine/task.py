@@ -4,27 +4,35 @@
 #
 # SPDX-License-Identifier: MIT
 
+import collections
+import errno
+import functools
+import io
 import itertools
+import mimetypes
 import fnmatch
 import os
 import sys
+import time
 from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
 from rest_framework.serializers import ValidationError
 import rq
 import re
 import shutil
-from distutils.dir_util import copy_tree
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from traceback import print_exception
 from urllib import parse as urlparse
 from urllib import request as urlrequest
 import requests
+from requests.adapters import HTTPAdapter
 import ipaddress
+import av
 import dns.resolver
 import django_rq
 import pytz
 
 from django.conf import settings
-from django.db import transaction
+from django.db import connection, transaction
 from datetime import datetime
 
 from cvat.apps.engine import models
@@ -32,6 +40,7 @@ from cvat.apps.engine.log import slogger
 from cvat.apps.engine.media_extractors import (MEDIA_TYPES, Mpeg4ChunkWriter, Mpeg4CompressedChunkWriter,
     ValidateDimension, ZipChunkWriter, ZipCompressedChunkWriter, get_mime, sort)
 from cvat.apps.engine.utils import av_scan_paths
+from cvat.apps.dataset_manager.util import bulk_create
 from utils.dataset_manifest import ImageManifestManager, VideoManifestManager, is_manifest
 from utils.dataset_manifest.core import VideoManifestValidator
 from utils.dataset_manifest.utils import detect_related_images
@@ -63,6 +72,35 @@ def rq_handler(job, exc_type, exc_value, traceback):
 
 JobFileMapping = List[List[str]]
 
+# Limits the size of a single INSERT query for the tasks with many images
+_BULK_CREATE_BATCH_SIZE = 500
+
+class _JobMetaUpdater:
+    """
+    Saves the RQ job meta not more often than once per the interval.
+    Each save is a request to Redis, while the progress can change very often.
+    """
+
+    def __init__(self, job, interval: float = 0.25):
+        self._job = job
+        self._interval = interval
+        self._last_save_time = None
+        self._has_changes = False
+
+    def update(self, **meta):
+        self._job.meta.update(meta)
+        self._has_changes = True
+
+        if self._last_save_time is None or \
+                self._interval <= time.monotonic() - self._last_save_time:
+            self.save()
+
+    def save(self):
+        if self._has_changes:
+            self._job.save_meta()
+            self._last_save_time = time.monotonic()
+            self._has_changes = False
+
 class SegmentParams(NamedTuple):
     start_frame: int
     stop_frame: int
@@ -72,6 +110,97 @@ class SegmentsParams(NamedTuple):
     segment_size: int
     overlap: int
 
+def _split_into_chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    return iter(lambda: list(itertools.islice(iterator, chunk_size)), [])
+
+def _map_ahead(executor, func, iterable, max_pending, max_pending_size, get_size):
+    """
+    Like Executor.map(), but takes no more than max_pending items of the iterable
+    ahead of the consumer, and only while their total get_size() is within
+    max_pending_size. At least one item is always taken. Executor.map() consumes
+    the whole iterable at once.
+
+    If an item fails, or the generator is closed, the pending items are cancelled.
+    """
+    pending = collections.deque()
+    pending_size = 0
+    try:
+        for item in iterable:
+            item_size = get_size(item)
+            pending.append((executor.submit(func, item), item_size))
+            pending_size += item_size
+            while 1 < len(pending) and \
+                    (max_pending < len(pending) or max_pending_size < pending_size):
+                future, item_size = pending.popleft()
+                pending_size -= item_size
+                yield future.result()
+
+        while pending:
+            future, _ = pending.popleft()
+            yield future.result()
+    except BaseException:
+        for future, _ in pending:
+            future.cancel()
+        raise
+
+def _get_chunk_data_size(chunk):
+    # Estimates the memory taken by the chunk frames before they are encoded.
+    # Image files are read by the writers, but the archive members
+    # and the decoded video frames are already in memory.
+    size = 0
+    for image, _, _ in chunk[1]:
+        if isinstance(image, io.BytesIO):
+            size += image.getbuffer().nbytes
+        elif isinstance(image, av.VideoFrame):
+            size += image.width * image.height * 3
+    return size
+
+def _copy_file(source_path, target_path):
+    # copy_file_range() lets the filesystem clone the data or copy it on the server
+    # side (e.g. btrfs, XFS, NFS), instead of passing it through the process
+    if hasattr(os, 'copy_file_range'):
+        with open(source_path, 'rb') as source_file, open(target_path, 'wb') as target_file:
+            try:
+                while os.copy_file_range(source_file.fileno(), target_file.fileno(), 1 << 30):
+                    pass
+                return
+            except OSError as ex:
+                if ex.errno not in {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}:
+                    raise
+
+    shutil.copyfile(source_path, target_path)
+
+def _copy_tree(source_dir, target_dir, max_workers=16):
+    # The files are copied concurrently, because there are usually many small ones
+    # and the copying time is mostly spent waiting for the storage
+    file_pairs = []
+    # Directory symlinks are followed like copy_tree() did, but each directory
+    # is visited once, so a link cycle can't make the walk endless
+    visited_dirs = set()
+    for dirpath, dirnames, filenames in os.walk(source_dir, followlinks=True):
+        dir_stat = os.stat(dirpath)
+        dir_key = (dir_stat.st_dev, dir_stat.st_ino)
+        if dir_key in visited_dirs:
+            dirnames.clear()
+            continue
+        visited_dirs.add(dir_key)
+
+        target_subdir = os.path.join(target_dir, os.path.relpath(dirpath, source_dir))
+        os.makedirs(target_subdir, exist_ok=True)
+        file_pairs.extend(
+            (os.path.join(dirpath, filename), os.path.join(target_subdir, filename))
+            for filename in filenames
+        )
+
+    def _copy(file_pair):
+        _copy_file(*file_pair)
+        shutil.copystat(*file_pair)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in executor.map(_copy, file_pairs):
+            pass
+
 def _copy_data_from_source(server_files, upload_dir, server_dir=None):
     job = rq.get_current_job()
     job.meta['status'] = 'Data are being copied from source..'
@@ -84,12 +213,12 @@ def _copy_data_from_source(server_files, upload_dir, server_dir=None):
             source_path = os.path.join(server_dir, os.path.normpath(path))
         target_path = os.path.join(upload_dir, path)
         if os.path.isdir(source_path):
-            copy_tree(source_path, target_path)
+            _copy_tree(source_path, target_path)
         else:
             target_dir = os.path.dirname(target_path)
             if not os.path.exists(target_dir):
                 os.makedirs(target_dir)
-            shutil.copyfile(source_path, target_path)
+            _copy_file(source_path, target_path)
 
 def _get_task_segment_data(
     db_task: models.Task,
@@ -150,29 +279,67 @@ def _save_task_to_db(db_task: models.Task, *, job_file_mapping: Optional[JobFile
     db_task.segment_size = segment_size
     db_task.overlap = overlap
 
-    for segment_idx, (start_frame, stop_frame) in enumerate(segments):
-        slogger.glob.info("New segment for task #{}: idx = {}, start_frame = {}, \
-            stop_frame = {}".format(db_task.id, segment_idx, start_frame, stop_frame))
-
-        db_segment = models.Segment()
-        db_segment.task = db_task
-        db_segment.start_frame = start_frame
-        db_segment.stop_frame = stop_frame
-        db_segment.save()
-
-        db_job = models.Job(segment=db_segment)
-        db_job.save()
-
+    db_segments = [
+        models.Segment(task=db_task, start_frame=start_frame, stop_frame=stop_frame)
+        for start_frame, stop_frame in segments
+    ]
+    slogger.glob.info("New segments for task #{}: {}".format(db_task.id,
+        ', '.join('[{}, {}]'.format(db_segment.start_frame, db_segment.stop_frame)
+            for db_segment in db_segments)))
+    db_segments = bulk_create(models.Segment, db_segments, {'task_id': db_task.id})
+
+    db_jobs = bulk_create(models.Job,
+        [models.Job(segment=db_segment) for db_segment in db_segments],
+        {'segment__task_id': db_task.id})
+
+    # bulk_create() doesn't call Job.save(), so the commits are added here
+    models.JobCommit.objects.bulk_create([
+        models.JobCommit(job=db_job, scope='create', owner=db_task.owner, data={
+            'stage': db_job.stage, 'state': db_job.state, 'assignee': db_job.assignee
+        })
+        for db_job in db_jobs
+    ])
+
+    # post_save signals are not sent either. New jobs have the default
+    # status, so the task gets the same one.
+    db_task.status = models.StatusChoice.ANNOTATION
+
+    for db_job in db_jobs:
         job_path = db_job.get_dirname()
-        if os.path.isdir(job_path):
+        try:
+            os.makedirs(job_path)
+        except FileExistsError:
+            # a directory can be left from a removed job with the same id
             shutil.rmtree(job_path)
-        os.makedirs(job_path)
+            os.makedirs(job_path)
 
     db_task.data.save()
     db_task.save()
 
+def _join_paths(root_dir, file_names):
+    # The names are relative and normalized, so a simple concatenation gives
+    # the same result as os.path.join(), but much faster for long lists
+    prefix = os.path.join(root_dir, '')
+    return [prefix + file_name for file_name in file_names]
+
+def _make_relative_path_getter(root_dir):
+    # The media paths are usually built by prefixing the names with the root directory,
+    # so the prefix can be cut off without calling the much slower os.path.relpath()
+    prefix = os.path.join(root_dir, '')
+    prefix_len = len(prefix)
+
+    def get_relative_path(path):
+        if path.startswith(prefix):
+            return path[prefix_len:]
+        return os.path.relpath(path, root_dir)
+
+    return get_relative_path
+
 def _count_files(data):
     share_root = settings.SHARE_ROOT
+    # commonprefix() compares characters, so it would accept 'share0/...' for 'share'
+    share_root_abs = os.path.abspath(share_root)
+    share_root_prefix = os.path.join(share_root_abs, '')
     server_files = []
 
     for path in data["server_files"]:
@@ -180,7 +347,7 @@ def _count_files(data):
         if '..' in path.split(os.path.sep):
             raise ValueError("Don't use '..' inside file paths")
         full_path = os.path.abspath(os.path.join(share_root, path))
-        if os.path.commonprefix([share_root, full_path]) != share_root:
+        if full_path != share_root_abs and not full_path.startswith(share_root_prefix):
             raise ValueError("Bad file path: " + path)
         server_files.append(path)
 
@@ -190,15 +357,26 @@ def _count_files(data):
     # Let's keep all items which aren't substrings of the previous item. In
     # the example above only 2.txt and 1.txt files will be in the final list.
     # Also need to correctly handle 'a/b/c0', 'a/b/c' case.
-    without_extra_dirs = [v[1] for v in zip([""] + sorted_server_files, sorted_server_files)
-        if not os.path.dirname(v[0]).startswith(v[1])]
+    without_extra_dirs = {v[1] for v in zip([""] + sorted_server_files, sorted_server_files)
+        if not os.path.dirname(v[0]).startswith(v[1])}
 
     # we need to keep the original sequence of files
     data['server_files'] = [f for f in server_files if f in without_extra_dirs]
 
+    # These media types are detected by the file name only, so the result is the same
+    # for the same extension. An encoding extension (e.g. '.gz') is not enough,
+    # because the type also depends on the extension before it.
+    name_based_types = {'image', 'video', 'archive', 'pdf', 'zip'}
+    mime_by_extension = {}
+
     def count_files(file_mapping, counter):
         for rel_path, full_path in file_mapping.items():
-            mime = get_mime(full_path)
+            extension = os.path.splitext(full_path)[1].lower()
+            mime = mime_by_extension.get(extension)
+            if mime is None:
+                mime = get_mime(full_path)
+                if mime in name_based_types and extension not in mimetypes.encodings_map:
+                    mime_by_extension[extension] = mime
             if mime in counter:
                 counter[mime].append(rel_path)
             elif rel_path.endswith('.jsonl'):
@@ -215,17 +393,18 @@ def _count_files(data):
     )
 
     count_files(
-        file_mapping={ f:os.path.abspath(os.path.join(share_root, f)) for f in data['server_files']},
+        file_mapping=dict(zip(data['server_files'],
+            _join_paths(os.path.abspath(share_root), data['server_files']))),
         counter=counter,
     )
 
     return counter
 
 def _find_manifest_files(data):
-    manifest_files = []
-    for files in ['client_files', 'server_files', 'remote_files']:
-        manifest_files.extend(list(filter(lambda x: x.endswith('.jsonl'), data[files])))
-    return manifest_files
+    return [
+        f for files in ('client_files', 'server_files', 'remote_files')
+        for f in data[files] if f.endswith('.jsonl')
+    ]
 
 def _validate_data(counter, manifest_files=None):
     unique_entries = 0
@@ -264,7 +443,7 @@ def _validate_job_file_mapping(
 
     if job_file_mapping is None:
         return None
-    elif not list(itertools.chain.from_iterable(job_file_mapping)):
+    elif not any(job_file_mapping):
         raise ValidationError("job_file_mapping cannot be empty")
 
     if db_task.segment_size:
@@ -312,6 +491,14 @@ def _validate_manifest(manifests, root_dir, is_in_cloud, db_cloud_storage, data_
         raise ValidationError('Invalid manifest was uploaded')
     return None
 
+@functools.lru_cache(maxsize=None)
+def _get_dns_resolver():
+    # The resolver keeps the answers until their TTLs expire, so the URLs
+    # from the same host don't need a DNS request each
+    resolver = dns.resolver.Resolver()
+    resolver.cache = dns.resolver.LRUCache()
+    return resolver
+
 def _validate_url(url):
     def _validate_ip_address(ip_address):
         if not ip_address.is_global:
@@ -331,7 +518,7 @@ def _validate_url(url):
         ip_v4_records = None
         ip_v6_records = None
         try:
-            ip_v4_records = dns.resolver.query(parsed_url.hostname, 'A')
+            ip_v4_records = _get_dns_resolver().resolve(parsed_url.hostname, 'A', search=True)
             for record in ip_v4_records:
                 _validate_ip_address(ipaddress.ip_address(record.to_text()))
         except ValidationError:
@@ -340,7 +527,7 @@ def _validate_url(url):
             slogger.glob.info('Cannot get A record for domain \'{}\': {}'.format(parsed_url.hostname, e))
 
         try:
-            ip_v6_records = dns.resolver.query(parsed_url.hostname, 'AAAA')
+            ip_v6_records = _get_dns_resolver().resolve(parsed_url.hostname, 'AAAA', search=True)
             for record in ip_v6_records:
                 _validate_ip_address(ipaddress.ip_address(record.to_text()))
         except ValidationError:
@@ -351,27 +538,54 @@ def _validate_url(url):
         if not ip_v4_records and not ip_v6_records:
             raise ValidationError('Cannot resolve IP address for domain \'{}\''.format(parsed_url.hostname))
 
-def _download_data(urls, upload_dir):
+def _download_data(urls, upload_dir, max_workers=16):
     job = rq.get_current_job()
     local_files = {}
     for url in urls:
         name = os.path.basename(urlrequest.url2pathname(urlparse.urlparse(url).path))
         if name in local_files:
             raise Exception("filename collision: {}".format(name))
+        local_files[name] = url
+
+    def _download(session, url, name):
         _validate_url(url)
         slogger.glob.info("Downloading: {}".format(url))
-        job.meta['status'] = '{} is being downloaded..'.format(url)
-        job.save_meta()
 
-        response = requests.get(url, stream=True)
+        response = session.get(url, stream=True)
         if response.status_code == 200:
             response.raw.decode_content = True
             with open(os.path.join(upload_dir, name), 'wb') as output_file:
-                shutil.copyfileobj(response.raw, output_file)
+                shutil.copyfileobj(response.raw, output_file, length=1024 * 1024)
         else:
             raise Exception("Failed to download " + url)
 
-        local_files[name] = True
+    if not local_files:
+        return []
+
+    # The files are downloaded concurrently, and the connections
+    # are reused for the files from the same host
+    max_workers = min(max_workers, len(local_files))
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_download, session, url, name)
+                for name, url in local_files.items()
+            ]
+            meta_updater = _JobMetaUpdater(job)
+            try:
+                for downloaded_count, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    meta_updater.update(status='{} of {} files are downloaded..'.format(
+                        downloaded_count, len(futures)))
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+            meta_updater.save()
 
     return list(local_files.keys())
 
@@ -402,7 +616,8 @@ def _create_task_manifest_based_on_cloud_storage_manifest(
     sorted_content = (i[1] for i in sorted(zip(sequence, content)))
     manifest.create(sorted_content)
 
-@transaction.atomic
+_RELATED_IMAGES_DIR_RE = re.compile(r'(^|{0})related_images{0}'.format(re.escape(os.sep)))
+
 def _create_thread(
     db_task: Union[int, models.Task],
     data: Dict[str, Any],
@@ -411,11 +626,13 @@ def _create_thread(
     isDatasetImport: bool = False,
 ) -> None:
     if isinstance(db_task, int):
-        db_task = models.Task.objects.select_for_update().get(pk=db_task)
+        db_task = models.Task.objects.get(pk=db_task)
 
     slogger.glob.info("create task #{}".format(db_task.id))
 
     job_file_mapping = _validate_job_file_mapping(db_task, data)
+    job_files = list(itertools.chain.from_iterable(job_file_mapping)) \
+        if job_file_mapping is not None else None
 
     db_data = db_task.data
     upload_dir = db_data.get_upload_dirname() if db_data.storage != models.StorageChoice.SHARE else settings.SHARE_ROOT
@@ -461,8 +678,9 @@ def _create_thread(
                 'Please remove extra files and keep only manifest file in server_files field.'
             )
 
-        cloud_storage_manifest_data = list(cloud_storage_manifest.data) if not cloud_storage_manifest_prefix \
-            else [os.path.join(cloud_storage_manifest_prefix, f) for f in cloud_storage_manifest.data]
+        # The manifest content is consumed lazily, so only the matched names are kept in memory
+        cloud_storage_manifest_data = cloud_storage_manifest.data if not cloud_storage_manifest_prefix \
+            else (os.path.join(cloud_storage_manifest_prefix, f) for f in cloud_storage_manifest.data)
         if data['filename_pattern'] == '*':
             server_files = cloud_storage_manifest_data
         else:
@@ -481,7 +699,7 @@ def _create_thread(
             _copy_data_from_source(data['server_files'], upload_dir, data.get('server_files_path'))
         elif is_data_in_cloud:
             if job_file_mapping is not None:
-                sorted_media = list(itertools.chain.from_iterable(job_file_mapping))
+                sorted_media = job_files
             else:
                 sorted_media = sort(media['image'], data['sorting_method'])
 
@@ -496,7 +714,9 @@ def _create_thread(
     job.meta['status'] = 'Media files are being extracted...'
     job.save_meta()
 
-    db_images = []
+    # (path, frame, width, height) for each image. The model instances are
+    # created only for the batch being inserted, which takes less memory.
+    image_properties = []
     extractor = None
     manifest_index = _get_manifest_frame_indexer()
 
@@ -506,7 +726,7 @@ def _create_thread(
         media['image'].extend(
             [os.path.relpath(image, upload_dir) for image in
                 MEDIA_TYPES['directory']['extractor'](
-                    source_path=[os.path.join(upload_dir, f) for f in media['directory']],
+                    source_path=_join_paths(upload_dir, media['directory']),
                 ).absolute_source_paths
             ]
         )
@@ -521,7 +741,7 @@ def _create_thread(
                 db_data.start_frame = 0
                 data['stop_frame'] = None
                 db_data.frame_filter = ''
-            source_paths=[os.path.join(upload_dir, f) for f in media_files]
+            source_paths=_join_paths(upload_dir, media_files)
             if manifest_file and not isBackupRestore and data['sorting_method'] in {models.SortingMethod.RANDOM, models.SortingMethod.PREDEFINED}:
                 raise Exception("It isn't supported to upload manifest file and use random sorting")
             if isBackupRestore and db_data.storage_method == models.StorageMethodChoice.FILE_SYSTEM and \
@@ -559,12 +779,16 @@ def _create_thread(
         db_task.dimension = models.DimensionType.DIM_3D
 
         keys_of_related_files = validate_dimension.related_files.keys()
-        absolute_keys_of_related_files = [os.path.join(upload_dir, f) for f in keys_of_related_files]
+        absolute_keys_of_related_files = _join_paths(upload_dir, keys_of_related_files)
         # When a task is created, the sorting method can be random and in this case, reinitialization will be with correct sorting
         # but when a task is restored from a backup, a random sorting is changed to predefined and we need to manually sort files
         # in the correct order.
-        source_files = absolute_keys_of_related_files if not isBackupRestore else \
-            [item for item in extractor.absolute_source_paths if item in absolute_keys_of_related_files]
+        if not isBackupRestore:
+            source_files = absolute_keys_of_related_files
+        else:
+            absolute_keys_of_related_files = set(absolute_keys_of_related_files)
+            source_files = [item for item in extractor.absolute_source_paths
+                if item in absolute_keys_of_related_files]
         extractor.reconcile(
             source_files=source_files,
             step=db_data.get_frame_step(),
@@ -575,7 +799,7 @@ def _create_thread(
 
     related_images = {}
     if isinstance(extractor, MEDIA_TYPES['image']['extractor']):
-        extractor.filter(lambda x: not re.search(r'(^|{0})related_images{0}'.format(os.sep), x))
+        extractor.filter(lambda x: not _RELATED_IMAGES_DIR_RE.search(x))
         related_images = detect_related_images(extractor.absolute_source_paths, upload_dir)
 
     # Sort the files
@@ -589,15 +813,18 @@ def _create_thread(
         sorted_media_files = []
 
         if job_file_mapping:
-            sorted_media_files.extend(itertools.chain.from_iterable(job_file_mapping))
+            sorted_media_files.extend(job_files)
         else:
             # we should sort media_files according to the manifest content sequence
             # and we should do this in general after validation step for 3D data and after filtering from related_images
             manifest = ImageManifestManager(db_data.get_manifest_path())
             manifest.set_index()
 
-            for idx in range(len(extractor.absolute_source_paths)):
-                properties = manifest[idx]
+            # the manifest is read sequentially, an indexed access reopens the file for each item
+            media_file_count = len(extractor.absolute_source_paths)
+            if len(manifest) < media_file_count:
+                raise ValidationError('The manifest has fewer items than the media files')
+            for _, properties in itertools.islice(manifest, media_file_count):
                 image_name = properties.get('name', None)
                 image_extension = properties.get('extension', None)
 
@@ -605,7 +832,7 @@ def _create_thread(
                 if full_image_path:
                     sorted_media_files.append(full_image_path)
 
-        sorted_media_files = [os.path.join(upload_dir, fn) for fn in sorted_media_files]
+        sorted_media_files = _join_paths(upload_dir, sorted_media_files)
 
         for file_path in sorted_media_files:
             if not file_path in extractor:
@@ -613,12 +840,9 @@ def _create_thread(
                     f"Can't find file '{os.path.basename(file_path)}' in the input files"
                 )
 
-        media_files = sorted_media_files.copy()
-        del sorted_media_files
-
         data['sorting_method'] = models.SortingMethod.PREDEFINED
         extractor.reconcile(
-            source_files=media_files,
+            source_files=sorted_media_files,
             step=db_data.get_frame_step(),
             start=db_data.start_frame,
             stop=data['stop_frame'],
@@ -629,6 +853,9 @@ def _create_thread(
     db_data.compressed_chunk_type = models.DataChoice.VIDEO if task_mode == 'interpolation' and not data['use_zip_chunks'] else models.DataChoice.IMAGESET
     db_data.original_chunk_type = models.DataChoice.VIDEO if task_mode == 'interpolation' else models.DataChoice.IMAGESET
 
+    meta_updater = _JobMetaUpdater(job)
+    get_relative_path = _make_relative_path_getter(upload_dir)
+
     def update_progress(progress):
         progress_animation = '|/-\\'
         if not hasattr(update_progress, 'call_counter'):
@@ -637,9 +864,7 @@ def _create_thread(
         status_message = 'Images are being compressed'
         if not progress:
             status_message = '{} {}'.format(status_message, progress_animation[update_progress.call_counter])
-        job.meta['status'] = status_message
-        job.meta['task_progress'] = progress or 0.
-        job.save_meta()
+        meta_updater.update(status=status_message, task_progress=progress or 0.)
         update_progress.call_counter = (update_progress.call_counter + 1) % len(progress_animation)
 
     compressed_chunk_writer_class = Mpeg4CompressedChunkWriter if db_data.compressed_chunk_type == models.DataChoice.VIDEO else ZipCompressedChunkWriter
@@ -753,14 +978,13 @@ def _create_thread(
                     manifest.create()
                 else:
                     manifest.init_index()
-                counter = itertools.count()
-                for _, chunk_frames in itertools.groupby(extractor.frame_range, lambda x: next(counter) // db_data.chunk_size):
+                for chunk_frames in _split_into_chunks(extractor.frame_range, db_data.chunk_size):
                     chunk_paths = [(extractor.get_path(i), i) for i in chunk_frames]
                     img_sizes = []
 
-                    for chunk_path, frame_id in chunk_paths:
-                        properties = manifest[manifest_index(frame_id)]
-
+                    chunk_properties = manifest.get_items(
+                        manifest_index(frame_id) for _, frame_id in chunk_paths)
+                    for (chunk_path, frame_id), properties in zip(chunk_paths, chunk_properties):
                         # check mapping
                         if not chunk_path.endswith(f"{properties['name']}{properties['extension']}"):
                             raise Exception('Incorrect file mapping to manifest content')
@@ -770,66 +994,98 @@ def _create_thread(
                             resolution = extractor.get_image_size(frame_id)
                         img_sizes.append(resolution)
 
-                    db_images.extend([
-                        models.Image(data=db_data,
-                            path=os.path.relpath(path, upload_dir),
-                            frame=frame, width=w, height=h)
+                    image_properties.extend(
+                        (get_relative_path(path), frame, w, h)
                         for (path, frame), (w, h) in zip(chunk_paths, img_sizes)
-                    ])
+                    )
 
     if db_data.storage_method == models.StorageMethodChoice.FILE_SYSTEM or not settings.USE_CACHE:
-        counter = itertools.count()
-        generator = itertools.groupby(extractor, lambda x: next(counter) // db_data.chunk_size)
-        for chunk_idx, chunk_data in generator:
-            chunk_data = list(chunk_data)
+        def save_chunk(chunk):
+            chunk_idx, chunk_data = chunk
             original_chunk_path = db_data.get_original_chunk_path(chunk_idx)
             original_chunk_writer.save_as_chunk(chunk_data, original_chunk_path)
 
             compressed_chunk_path = db_data.get_compressed_chunk_path(chunk_idx)
             img_sizes = compressed_chunk_writer.save_as_chunk(chunk_data, compressed_chunk_path)
-
-            if db_task.mode == 'annotation':
-                db_images.extend([
-                    models.Image(
-                        data=db_data,
-                        path=os.path.relpath(data[1], upload_dir),
-                        frame=data[2],
-                        width=size[0],
-                        height=size[1])
-
-                    for data, size in zip(chunk_data, img_sizes)
+            return chunk_data, img_sizes
+
+        chunks = enumerate(_split_into_chunks(extractor, db_data.chunk_size))
+
+        # The chunks are independent, and the image and video codecs release the GIL,
+        # so the chunks are encoded concurrently while the next ones are read
+        with ThreadPoolExecutor(max_workers=settings.CHUNK_WRITER_THREADS) as executor:
+            saved_chunks = _map_ahead(executor, save_chunk, chunks,
+                2 * settings.CHUNK_WRITER_THREADS,
+                settings.CHUNK_WRITER_READ_AHEAD_SIZE, _get_chunk_data_size)
+            try:
+                for chunk_data, img_sizes in saved_chunks:
+                    if db_task.mode == 'annotation':
+                        image_properties.extend(
+                            (get_relative_path(data[1]), data[2], size[0], size[1])
+                            for data, size in zip(chunk_data, img_sizes)
+                        )
+                    else:
+                        video_size = img_sizes[0]
+                        video_path = chunk_data[0][1]
+
+                    db_data.size += len(chunk_data)
+                    progress = extractor.get_progress(chunk_data[-1][2])
+                    update_progress(progress)
+            except Exception:
+                # The queued chunks are cancelled, so the executor doesn't wait for them
+                saved_chunks.close()
+                raise
+        meta_updater.save()
+
+    # The media processing above doesn't change the database, so the transaction
+    # and the task row lock are only held while the results are saved
+    with transaction.atomic():
+        # The task could be updated while the media were processed, so the locked
+        # row is read again, and only the fields computed here are copied onto it
+        locked_task = models.Task.objects.select_for_update().get(pk=db_task.id)
+        locked_task.data = db_data
+        locked_task.dimension = db_task.dimension
+        locked_task.mode = db_task.mode
+        db_task = locked_task
+
+        if db_task.mode == 'annotation':
+            # Only some backends return the ids of the inserted rows,
+            # the other ones require to read the images back
+            can_return_ids = connection.features.can_return_rows_from_bulk_insert
+            created_images = []
+            for batch_start in range(0, len(image_properties), _BULK_CREATE_BATCH_SIZE):
+                db_images = models.Image.objects.bulk_create([
+                    models.Image(data=db_data, path=path, frame=frame, width=width, height=height)
+                    for path, frame, width, height in
+                        image_properties[batch_start:batch_start + _BULK_CREATE_BATCH_SIZE]
                 ])
-            else:
-                video_size = img_sizes[0]
-                video_path = chunk_data[0][1]
-
-            db_data.size += len(chunk_data)
-            progress = extractor.get_progress(chunk_data[-1][2])
-            update_progress(progress)
-
-    if db_task.mode == 'annotation':
-        models.Image.objects.bulk_create(db_images)
-        created_images = models.Image.objects.filter(data_id=db_data.id)
+                if related_images and can_return_ids:
+                    created_images.extend(
+                        db_image for db_image in db_images if db_image.path in related_images
+                    )
+            if related_images and not can_return_ids:
+                created_images = models.Image.objects.filter(data_id=db_data.id)
 
-        db_related_files = [
-            models.RelatedFile(data=image.data, primary_image=image, path=os.path.join(upload_dir, related_file_path))
-            for image in created_images
-            for related_file_path in related_images.get(image.path, [])
-        ]
-        models.RelatedFile.objects.bulk_create(db_related_files)
-        db_images = []
-    else:
-        models.Video.objects.create(
-            data=db_data,
-            path=os.path.relpath(video_path, upload_dir),
-            width=video_size[0], height=video_size[1])
+            db_related_files = [
+                models.RelatedFile(data=db_data, primary_image=image, path=os.path.join(upload_dir, related_file_path))
+                for image in created_images
+                for related_file_path in related_images.get(image.path, [])
+            ]
+            models.RelatedFile.objects.bulk_create(db_related_files,
+                batch_size=_BULK_CREATE_BATCH_SIZE)
+            image_properties = []
+        else:
+            models.Video.objects.create(
+                data=db_data,
+                path=os.path.relpath(video_path, upload_dir),
+                width=video_size[0], height=video_size[1])
 
-    if db_data.stop_frame == 0:
-        db_data.stop_frame = db_data.start_frame + (db_data.size - 1) * db_data.get_frame_step()
-    else:
-        # validate stop_frame
-        db_data.stop_frame = min(db_data.stop_frame, \
-            db_data.start_frame + (db_data.size - 1) * db_data.get_frame_step())
+        if db_data.stop_frame == 0:
+            db_data.stop_frame = db_data.start_frame + (db_data.size - 1) * db_data.get_frame_step()
+        else:
+            # validate stop_frame
+            db_data.stop_frame = min(db_data.stop_frame, \
+                db_data.start_frame + (db_data.size - 1) * db_data.get_frame_step())
 
-    slogger.glob.info("Found frames {} for Data #{}".format(db_data.size, db_data.id))
-    _save_task_to_db(db_task, job_file_mapping=job_file_mapping)
+        slogger.glob.info("Found frames {} for Data #{}".format(db_data.size, db_data.id))
+        _save_task_to_db(db_task, job_file_mapping=job_file_mapping)
@@ -0,0 +1,134 @@
+# Copyright (C) 2023 CVAT.ai Corporation
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from cvat.apps.engine.cloud_provider import AzureBlobContainer, GoogleCloudStorage
+
+
+class _TempFileMixin:
+    def _create_file(self, size):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(bytes(i % 251 for i in range(size)))
+        return path
+
+class AzureBlobContainerUploadTest(_TempFileMixin, TestCase):
+    def setUp(self):
+        patcher = mock.patch('cvat.apps.engine.cloud_provider.BlobServiceClient')
+        self.addCleanup(patcher.stop)
+        self.service_client_cls = patcher.start()
+        self.container_client = self.service_client_cls.return_value.get_container_client.return_value
+
+        self.storage = AzureBlobContainer('container', 'account')
+
+    def test_can_upload_file_with_overwrite(self):
+        file_path = self._create_file(100)
+        metadata = {'key': 'value'}
+
+        self.storage.upload_file(file_path, 'target', metadata=metadata)
+
+        self.container_client.upload_blob.assert_called_once()
+        kwargs = self.container_client.upload_blob.call_args.kwargs
+        self.assertEqual(kwargs['name'], 'target')
+        self.assertEqual(kwargs['length'], 100)
+        self.assertEqual(kwargs['metadata'], metadata)
+        self.assertEqual(kwargs['max_concurrency'], AzureBlobContainer.MAX_UPLOAD_CONCURRENCY)
+        self.assertTrue(kwargs['overwrite'])
+
+    def test_upload_file_uses_basename_by_default(self):
+        file_path = self._create_file(10)
+
+        self.storage.upload_file(file_path)
+
+        kwargs = self.container_client.upload_blob.call_args.kwargs
+        self.assertEqual(kwargs['name'], os.path.basename(file_path))
+
+class GoogleCloudStorageUploadTest(_TempFileMixin, TestCase):
+    def setUp(self):
+        patcher = mock.patch('cvat.apps.engine.cloud_provider.storage.Client')
+        self.addCleanup(patcher.stop)
+        self.client_cls = patcher.start()
+        self.bucket = self.client_cls.return_value.bucket.return_value
+
+        self.blobs = {}
+        self.uploaded_parts = {}
+
+        def _make_blob(name):
+            blob = mock.Mock()
+            blob.name = name
+
+            def _upload_from_file(f, size):
+                self.uploaded_parts[name] = f.read(size)
+            blob.upload_from_file.side_effect = _upload_from_file
+
+            self.blobs[name] = blob
+            return blob
+        self.bucket.blob.side_effect = _make_blob
+
+        self.storage = GoogleCloudStorage('bucket')
+
+    def test_can_upload_small_file_in_one_request(self):
+        file_path = self._create_file(100)
+
+        self.storage.upload_file(file_path, 'target', metadata={'key': 'value'})
+
+        self.assertEqual(list(self.blobs), ['target'])
+        blob = self.blobs['target']
+        blob.upload_from_filename.assert_called_once_with(file_path)
+        blob.compose.assert_not_called()
+        self.assertEqual(blob.metadata, {'key': 'value'})
+
+    def test_can_upload_big_file_in_parts(self):
+        file_size = 100
+        file_path = self._create_file(file_size)
+
+        with mock.patch.multiple(GoogleCloudStorage,
+                MULTIPART_THRESHOLD=10, MIN_PART_SIZE=30, MAX_PART_COUNT=32):
+            self.storage.upload_file(file_path, 'target', metadata={'key': 'value'})
+
+        target_blob = self.blobs.pop('target')
+        target_blob.upload_from_filename.assert_not_called()
+        self.assertEqual(target_blob.metadata, {'key': 'value'})
+
+        part_blobs = target_blob.compose.call_args.args[0]
+        self.assertEqual(len(part_blobs), 4)
+        self.assertEqual([len(self.uploaded_parts[b.name]) for b in part_blobs],
+            [25, 25, 25, 25])
+        with open(file_path, 'rb') as f:
+            self.assertEqual(b''.join(self.uploaded_parts[b.name] for b in part_blobs),
+                f.read())
+
+        for part_blob in part_blobs:
+            part_blob.delete.assert_called_once()
+
+    def test_part_count_is_limited(self):
+        file_path = self._create_file(100)
+
+        with mock.patch.multiple(GoogleCloudStorage,
+                MULTIPART_THRESHOLD=10, MIN_PART_SIZE=1, MAX_PART_COUNT=3):
+            self.storage.upload_file(file_path, 'target')
+
+        part_blobs = self.blobs['target'].compose.call_args.args[0]
+        self.assertEqual([len(self.uploaded_parts[b.name]) for b in part_blobs],
+            [34, 34, 32])
+
+    def test_parts_are_removed_if_upload_fails(self):
+        file_path = self._create_file(100)
+        self.bucket.blob.side_effect = None
+        part_blob = mock.Mock()
+        part_blob.upload_from_file.side_effect = Exception('upload failed')
+        self.bucket.blob.return_value = part_blob
+
+        with mock.patch.multiple(GoogleCloudStorage,
+                MULTIPART_THRESHOLD=10, MIN_PART_SIZE=50, MAX_PART_COUNT=32), \
+                mock.patch.object(GoogleCloudStorage, 'get_status'):
+            with self.assertRaises(Exception):
+                self.storage.upload_file(file_path, 'target')
+
+        part_blob.compose.assert_not_called()
+        self.assertEqual(part_blob.delete.call_count, 2)
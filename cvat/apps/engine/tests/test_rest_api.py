@@ -21,6 +21,7 @@ import copy
 
 import av
 import numpy as np
+import orjson
 from pdf2image import convert_from_bytes
 from django.conf import settings
 from django.contrib.auth.models import Group, User
@@ -35,7 +36,9 @@ from cvat.apps.engine.models import (AttributeSpec, AttributeType, Data, Job,
     Project, Segment, StageChoice, StatusChoice, Task, Label, StorageMethodChoice,
     StorageChoice, DimensionType, SortingMethod)
 from cvat.apps.engine.media_extractors import ValidateDimension, sort
+from cvat.apps.engine.backup import ProjectExporter, TaskExporter, Version
 from cvat.apps.engine.tests.utils import get_paginated_collection
+from cvat.apps.dataset_manager.views import get_export_cache_dir
 from utils.dataset_manifest import ImageManifestManager, VideoManifestManager
 
 #supress av warnings
@@ -2992,6 +2995,333 @@ class TaskImportExportAPITestCase(APITestCase):
     def test_api_v2_tasks_id_export_no_auth(self):
         self._run_api_v2_tasks_id_export_import(None)
 
+class BackupArchiveAPITestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.tasks = []
+
+    def tearDown(self):
+        for task in self.tasks:
+            shutil.rmtree(os.path.join(settings.TASKS_ROOT, str(task["id"])))
+            shutil.rmtree(os.path.join(settings.MEDIA_DATA_ROOT, str(task["data_id"])))
+
+    @classmethod
+    def setUpTestData(cls):
+        create_db_users(cls)
+
+    def _add_task(self, tid):
+        self.tasks.append({
+            "id": tid,
+            "data_id": Task.objects.get(pk=tid).data_id,
+        })
+
+    def _create_task(self, media_data, project_id=None):
+        task_data = {
+            "name": "my backup task",
+            "overlap": 0,
+            "segment_size": 2,
+        }
+        if project_id:
+            task_data["project_id"] = project_id
+        else:
+            task_data["labels"] = [{"name": "car"}, {"name": "person"}]
+
+        with ForceLogin(self.admin, self.client):
+            response = self.client.post('/api/tasks', data=task_data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            tid = response.data["id"]
+
+            response = self.client.post("/api/tasks/{}/data".format(tid), data=media_data)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self._add_task(tid)
+        return tid
+
+    def _export_task_backup(self, tid):
+        with ForceLogin(self.admin, self.client):
+            response = self.client.get('/api/tasks/{}/backup'.format(tid), format="json")
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+            response = self.client.get('/api/tasks/{}/backup'.format(tid), format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            response = self.client.get('/api/tasks/{}/backup?action=download'.format(tid), format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return io.BytesIO(b"".join(response.streaming_content))
+
+    def _import_task_backup(self, content):
+        with ForceLogin(self.admin, self.client):
+            response = self.client.post('/api/tasks/backup', data={"task_file": content}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+            rq_id = response.data["rq_id"]
+            response = self.client.post('/api/tasks/backup', data={"rq_id": rq_id}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        tid = response.data["id"]
+        self._add_task(tid)
+        return tid
+
+    def _create_project(self):
+        project_data = {
+            "name": "my backup project",
+            "labels": [{"name": "car"}, {"name": "person"}],
+        }
+
+        with ForceLogin(self.admin, self.client):
+            response = self.client.post('/api/projects', data=project_data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        return response.data["id"]
+
+    def _import_project_backup(self, content):
+        with ForceLogin(self.admin, self.client):
+            response = self.client.post('/api/projects/backup', data={"project_file": content}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+            rq_id = response.data["rq_id"]
+            response = self.client.post('/api/projects/backup', data={"rq_id": rq_id}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        pid = response.data["id"]
+        for db_task in Task.objects.filter(project_id=pid):
+            self._add_task(db_task.id)
+        return pid
+
+    def _export_backup_file(self, Exporter, pk, version):
+        fd, path = tempfile.mkstemp(suffix=".zip")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        Exporter(pk, version=version).export_to(path)
+        return path
+
+    @staticmethod
+    def _generate_image_media(count):
+        return {
+            **{
+                "client_files[{}]".format(i): generate_image_file("test_{}.jpg".format(i))[1]
+                for i in range(count)
+            },
+            "image_quality": 75,
+        }
+
+    def _put_annotations(self, tid):
+        db_task = Task.objects.get(pk=tid)
+        db_label = (db_task.project or db_task).label_set.order_by("id").first()
+        # The shapes are in different jobs
+        annotations = {
+            "version": 0,
+            "tags": [{
+                "frame": 1,
+                "label_id": db_label.id,
+                "group": None,
+                "source": "manual",
+                "attributes": [],
+            }],
+            "shapes": [{
+                "frame": frame,
+                "label_id": db_label.id,
+                "group": None,
+                "source": "manual",
+                "attributes": [],
+                "points": [1.0, 2.5, 100.0, 300.25],
+                "type": "rectangle",
+                "occluded": False,
+            } for frame in (0, 3)],
+            "tracks": [],
+        }
+
+        with ForceLogin(self.admin, self.client):
+            response = self.client.put("/api/tasks/{}/annotations".format(tid),
+                data=annotations, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _get_annotations(self, tid):
+        with ForceLogin(self.admin, self.client):
+            response = self.client.get("/api/tasks/{}/annotations".format(tid))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The ids are different in the restored task, so only the contents are compared
+        label_names = dict(Label.objects.values_list("id", "name"))
+        return {
+            "tags": sorted(
+                (tag["frame"], label_names[tag["label_id"]])
+                for tag in response.data["tags"]
+            ),
+            "shapes": sorted(
+                (shape["frame"], label_names[shape["label_id"]], shape["type"], shape["points"])
+                for shape in response.data["shapes"]
+            ),
+        }
+
+    def _check_restored_task(self, original_tid, restored_tid):
+        original_task = Task.objects.get(pk=original_tid)
+        restored_task = Task.objects.get(pk=restored_tid)
+        self.assertEqual(restored_task.name, original_task.name)
+        self.assertEqual(restored_task.data.size, original_task.data.size)
+        self.assertEqual(
+            Job.objects.filter(segment__task_id=restored_tid).count(),
+            Job.objects.filter(segment__task_id=original_tid).count())
+        self.assertEqual(self._get_annotations(restored_tid), self._get_annotations(original_tid))
+
+    def _check_task_annotations_layout(self, zip_object, version, prefix=""):
+        names = zip_object.namelist()
+        if version == Version.V1:
+            self.assertIn(prefix + "annotations.json", names)
+            self.assertNotIn(prefix + "annotations/job_0.json", names)
+        else:
+            self.assertNotIn(prefix + "annotations.json", names)
+            self.assertIn(prefix + "annotations/job_0.json", names)
+            self.assertIn(prefix + "annotations/job_1.json", names)
+
+    def _test_can_restore_task_backup(self, version):
+        tid = self._create_task(self._generate_image_media(4))
+        self._put_annotations(tid)
+
+        backup_path = self._export_backup_file(TaskExporter, tid, version)
+        with zipfile.ZipFile(backup_path) as zf:
+            self.assertEqual(orjson.loads(zf.read("task.json"))["version"], version.value)
+            self._check_task_annotations_layout(zf, version)
+
+        with open(backup_path, "rb") as f:
+            restored_tid = self._import_task_backup(f)
+
+        self._check_restored_task(tid, restored_tid)
+
+    def test_can_restore_task_backup_v1(self):
+        self._test_can_restore_task_backup(Version.V1)
+
+    def test_can_restore_task_backup_v1_1(self):
+        self._test_can_restore_task_backup(Version.V1_1)
+
+    def _test_can_restore_project_backup(self, version):
+        pid = self._create_project()
+        tids = [
+            self._create_task(self._generate_image_media(4), project_id=pid)
+            for _ in range(2)
+        ]
+        for tid in tids:
+            self._put_annotations(tid)
+
+        backup_path = self._export_backup_file(ProjectExporter, pid, version)
+        with zipfile.ZipFile(backup_path) as zf:
+            self.assertEqual(orjson.loads(zf.read("project.json"))["version"], version.value)
+            for idx in range(len(tids)):
+                self._check_task_annotations_layout(zf, version, prefix="task_{}/".format(idx))
+
+        with open(backup_path, "rb") as f:
+            restored_pid = self._import_project_backup(f)
+
+        restored_tids = list(Task.objects.filter(project_id=restored_pid)
+            .order_by("id").values_list("id", flat=True))
+        self.assertEqual(len(restored_tids), len(tids))
+        for tid, restored_tid in zip(tids, restored_tids):
+            self._check_restored_task(tid, restored_tid)
+
+    def test_can_restore_project_backup_v1(self):
+        self._test_can_restore_project_backup(Version.V1)
+
+    def test_can_restore_project_backup_v1_1(self):
+        self._test_can_restore_project_backup(Version.V1_1)
+
+    def _patch_task(self, tid, data):
+        with ForceLogin(self.admin, self.client):
+            response = self.client.patch('/api/tasks/{}'.format(tid), data=data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_can_reuse_cached_backup_of_unchanged_task(self):
+        tid = self._create_task({
+            "client_files[0]": generate_image_file("test_1.jpg")[1],
+            "image_quality": 75,
+        })
+
+        self._export_task_backup(tid)
+        archive_path = os.path.join(get_export_cache_dir(Task.objects.get(pk=tid)), "task_backup.zip")
+        archive_inode = os.stat(archive_path).st_ino
+
+        # The assignee is not included in the backup, the archive is kept
+        self._patch_task(tid, {"assignee_id": self.user.id})
+        self._export_task_backup(tid)
+        self.assertEqual(os.stat(archive_path).st_ino, archive_inode)
+
+        # The name is included, the archive is rebuilt
+        self._patch_task(tid, {"name": "my renamed backup task"})
+        content = self._export_task_backup(tid)
+        self.assertNotEqual(os.stat(archive_path).st_ino, archive_inode)
+        with zipfile.ZipFile(content) as zf:
+            self.assertEqual(orjson.loads(zf.read("task.json"))["name"], "my renamed backup task")
+
+    def test_can_check_import_status_with_rq_id_in_query(self):
+        tid = self._create_task({
+            "client_files[0]": generate_image_file("test_1.jpg")[1],
+            "image_quality": 75,
+        })
+        content = self._export_task_backup(tid)
+        task_ids = set(Task.objects.values_list("id", flat=True))
+
+        with ForceLogin(self.admin, self.client):
+            response = self.client.post('/api/tasks/backup', data={"task_file": content}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+            # No request body, the id is only in the query
+            rq_id = response.data["rq_id"]
+            response = self.client.post('/api/tasks/backup?rq_id={}'.format(rq_id))
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        restored_tids = set(Task.objects.values_list("id", flat=True)) - task_ids
+        self.assertEqual(restored_tids, {response.data["id"]})
+        self._add_task(response.data["id"])
+        self._check_restored_task(tid, response.data["id"])
+
+    def test_can_restore_duplicate_files_as_links(self):
+        _, image = generate_image_file("test_1.jpg")
+        duplicate = BytesIO(image.getvalue())
+        duplicate.name = "test_2.jpg"
+
+        # These files have the same size and the same beginning, longer than
+        # the compared prefix, but they are different. The data after
+        # the end of a JPEG image is ignored by the decoders.
+        _, padded_image = generate_image_file("test_3.jpg")
+        padded_data = padded_image.getvalue() + b"\0" * (100 * 1024)
+        similar_images = []
+        for name, last_byte in (("test_3.jpg", b"a"), ("test_4.jpg", b"b")):
+            similar_image = BytesIO(padded_data + last_byte)
+            similar_image.name = name
+            similar_images.append(similar_image)
+
+        tid = self._create_task({
+            "client_files[0]": image,
+            "client_files[1]": duplicate,
+            "client_files[2]": similar_images[0],
+            "client_files[3]": similar_images[1],
+            "image_quality": 75,
+        })
+
+        content = self._export_task_backup(tid)
+        with zipfile.ZipFile(content) as zf:
+            duplicate_members = [
+                zinfo for zinfo in zf.infolist()
+                if zinfo.comment.startswith(b"duplicate-of:")
+            ]
+        self.assertEqual(len(duplicate_members), 1)
+        self.assertIn(duplicate_members[0].filename, ("data/test_1.jpg", "data/test_2.jpg"))
+        self.assertEqual(duplicate_members[0].file_size, 0)
+
+        content.seek(0)
+        imported_tid = self._import_task_backup(content)
+
+        upload_dir = Task.objects.get(pk=imported_tid).data.get_upload_dirname()
+        self.assertTrue(os.path.samefile(
+            os.path.join(upload_dir, "test_1.jpg"), os.path.join(upload_dir, "test_2.jpg")))
+        self.assertFalse(os.path.samefile(
+            os.path.join(upload_dir, "test_3.jpg"), os.path.join(upload_dir, "test_4.jpg")))
+        for name, expected_image in (("test_1.jpg", image), ("test_3.jpg", similar_images[0]),
+                ("test_4.jpg", similar_images[1])):
+            with open(os.path.join(upload_dir, name), "rb") as f:
+                self.assertEqual(f.read(), expected_image.getvalue())
+
 def generate_image_file(filename):
     f = BytesIO()
     gen = random.SystemRandom()
@@ -0,0 +1,75 @@
+# Copyright (C) 2023 CVAT.ai Corporation
+#
+# SPDX-License-Identifier: MIT
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from cvat.apps.engine.task import _map_ahead
+
+
+class MapAheadTest(TestCase):
+    def test_can_map_in_order(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(_map_ahead(executor, lambda x: x * 2, range(10),
+                max_pending=3, max_pending_size=0, get_size=lambda x: 0))
+
+        self.assertEqual(results, [x * 2 for x in range(10)])
+
+    def test_limits_pending_items_by_count(self):
+        taken = []
+
+        def items():
+            for i in range(10):
+                taken.append(i)
+                yield i
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = _map_ahead(executor, lambda x: x, items(),
+                max_pending=2, max_pending_size=1 << 30, get_size=lambda x: 0)
+            self.assertEqual(next(results), 0)
+            self.assertEqual(len(taken), 3)
+            list(results)
+
+    def test_limits_pending_items_by_size(self):
+        taken = []
+
+        def items():
+            for i in range(10):
+                taken.append(i)
+                yield i
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = _map_ahead(executor, lambda x: x, items(),
+                max_pending=100, max_pending_size=30, get_size=lambda x: 10)
+            self.assertEqual(next(results), 0)
+            self.assertEqual(len(taken), 4)
+            list(results)
+
+    def test_later_items_are_not_processed_after_failure(self):
+        processed = []
+        failed_item = 1
+        item_count = 20
+        lock = threading.Lock()
+
+        def process(item):
+            if item == failed_item:
+                raise ValueError("corrupted chunk")
+            with lock:
+                processed.append(item)
+            return item
+
+        with self.assertRaises(ValueError):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                results = _map_ahead(executor, process, range(item_count),
+                    max_pending=2, max_pending_size=0, get_size=lambda x: 0)
+                try:
+                    for _ in results:
+                        pass
+                except Exception:
+                    results.close()
+                    raise
+
+        # Only the items taken before the failure could be processed
+        self.assertLessEqual(max(processed), failed_item + 2)
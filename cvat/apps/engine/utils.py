@@ -124,7 +124,7 @@ def parse_exception_message(msg):
     return parsed_msg
 
 def process_failed_job(rq_job):
-    if rq_job.meta['tmp_file_descriptor']:
+    if rq_job.meta.get('tmp_file_descriptor'):
         os.close(rq_job.meta['tmp_file_descriptor'])
     if os.path.exists(rq_job.meta['tmp_file']):
         os.remove(rq_job.meta['tmp_file'])
@@ -146,3 +146,16 @@ def configure_dependent_job(queue, rq_id, rq_func, db_storage, filename, key):
             job_id=rq_job_id_download_file
         )
     return rq_job_download_file
+
+_TRUE_VALUES = frozenset(('y', 'yes', 't', 'true', 'on', '1'))
+_FALSE_VALUES = frozenset(('n', 'no', 'f', 'false', 'off', '0'))
+
+def strtobool(val: str) -> bool:
+    # The same as distutils.util.strtobool(), distutils is deprecated
+    val = val.lower()
+    if val in _TRUE_VALUES:
+        return True
+    elif val in _FALSE_VALUES:
+        return False
+
+    raise ValueError(f"invalid truth value {val!r}")
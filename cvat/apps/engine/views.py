@@ -10,7 +10,6 @@ import pytz
 import shutil
 import traceback
 from datetime import datetime
-from distutils.util import strtobool
 from tempfile import mkstemp
 
 from django.db.models.query import Prefetch
@@ -64,7 +63,7 @@ from cvat.apps.engine.serializers import (
 from utils.dataset_manifest import ImageManifestManager
 from cvat.apps.engine.view_utils import make_paginated_response
 from cvat.apps.engine.utils import (
-    av_scan_paths, process_failed_job, configure_dependent_job, parse_exception_message
+    av_scan_paths, process_failed_job, configure_dependent_job, parse_exception_message, strtobool
 )
 from cvat.apps.engine import backup
 from cvat.apps.engine.mixins import PartialUpdateModelMixin, UploadMixin, AnnotationMixin, SerializeMixin, DestroyModelMixin, CreateModelMixin
@@ -2202,9 +2201,7 @@ def rq_handler(job, exc_type, exc_value, tb):
 def _download_file_from_bucket(db_storage, filename, key):
     storage = db_storage_to_storage_instance(db_storage)
 
-    data = storage.download_fileobj(key)
-    with open(filename, 'wb+') as f:
-        f.write(data.getbuffer())
+    storage.download_file(key, filename)
 
 def _import_annotations(request, rq_id, rq_func, pk, format_name,
                         filename=None, location_conf=None, conv_mask_to_poly=True):
@@ -2,6 +2,8 @@
 #
 # SPDX-License-Identifier: MIT
 
+from functools import lru_cache
+
 from django.conf import settings
 from django.utils.module_loading import import_string
 from rest_framework.exceptions import PermissionDenied
@@ -24,13 +26,17 @@ class DefaultLimitsReachedException(PermissionDenied):
         super().__init__({"message": msg})
 
 class ExceptionFactory:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_exception_class(dotted_path):
+        if dotted_path is None:
+            return DefaultLimitsReachedException
+
+        return import_string(dotted_path)
+
     def __call__(self, *args, **kwargs):
         dotted_path = getattr(settings, "IAM_BASE_EXCEPTION", None)
-        print(dotted_path)
-
-        if dotted_path is None:
-            return DefaultLimitsReachedException(*args, **kwargs)
 
-        return import_string(dotted_path)(*args, **kwargs)
+        return self._get_exception_class(dotted_path)(*args, **kwargs)
 
 LimitsReachedException = ExceptionFactory()
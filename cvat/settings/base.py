@@ -530,6 +530,11 @@ CACHES = {
 
 USE_CACHE = True
 
+# Task chunks are encoded by this number of threads. The frames read ahead
+# for the encoding are limited by their size in memory.
+CHUNK_WRITER_THREADS = int(os.getenv('CVAT_CHUNK_WRITER_THREADS', 2))
+CHUNK_WRITER_READ_AHEAD_SIZE = int(os.getenv('CVAT_CHUNK_WRITER_READ_AHEAD_SIZE', 256 * 1024 * 1024)) # 256 MB
+
 CORS_ALLOW_HEADERS = list(default_headers) + [
     # tus upload protocol headers
     'upload-offset',
@@ -4,7 +4,10 @@
 
 import io
 import itertools
+import json
 import os
+import shutil
+import time
 from logging import Logger
 from pathlib import Path
 from typing import Tuple
@@ -20,6 +23,7 @@ try:
     import torch
     import torchvision.transforms
     import torchvision.transforms.functional as TF
+    from cvat_sdk.pytorch.caching import make_cache_manager
     from torch.utils.data import DataLoader
 except ImportError:
     cvatpt = None
@@ -255,6 +259,63 @@ class TestTaskVisionDataset:
 
         assert fresh_samples == cached_samples
 
+    def test_removed_chunks_are_downloaded_again(self):
+        cache_manager = make_cache_manager(self.client, cvatpt.UpdatePolicy.IF_MISSING_OR_STALE)
+        task = cache_manager.retrieve_task(self.task.id)
+        cache_manager.chunk_dir(task.id).mkdir()
+
+        cache_manager.ensure_chunks(task, [0, 1])
+
+        # simulate another process clearing the cache
+        chunk_path = cache_manager.chunk_dir(task.id) / "0.zip"
+        chunk_path.unlink()
+
+        cache_manager.ensure_chunks(task, [0, 1])
+
+        assert chunk_path.is_file()
+
+    def test_stale_cache_is_purged_despite_matching_mtime(self):
+        cvatpt.TaskVisionDataset(self.client, self.task.id)
+
+        cache_manager = make_cache_manager(self.client, cvatpt.UpdatePolicy.IF_MISSING_OR_STALE)
+        task_json_path = cache_manager.task_json_path(self.task.id)
+        task_json_stat = task_json_path.stat()
+
+        # make the cache older than the task on the server, but keep the modification time
+        old_updated_date = "2000-01-01T00:00:00+00:00"
+        task_json = json.loads(task_json_path.read_bytes())
+        task_json["updated_date"] = old_updated_date
+        task_json_path.write_text(json.dumps(task_json))
+        os.utime(task_json_path, ns=(task_json_stat.st_atime_ns, task_json_stat.st_mtime_ns))
+
+        marker_path = cache_manager.task_dir(self.task.id) / "marker"
+        marker_path.touch()
+
+        cvatpt.TaskVisionDataset(self.client, self.task.id)
+
+        assert not marker_path.exists()
+        assert json.loads(task_json_path.read_bytes())["updated_date"] != old_updated_date
+
+    def test_leftover_trash_dirs_are_removed(self):
+        cvatpt.TaskVisionDataset(self.client, self.task.id)
+
+        # simulate a purge that was interrupted before its trash dir was deleted
+        cache_manager = make_cache_manager(self.client, cvatpt.UpdatePolicy.IF_MISSING_OR_STALE)
+        task_dir = cache_manager.task_dir(self.task.id)
+        trash_dir = task_dir.with_name(task_dir.name + ".trash-leftover")
+        shutil.copytree(task_dir, trash_dir)
+
+        make_cache_manager(self.client, cvatpt.UpdatePolicy.IF_MISSING_OR_STALE)
+
+        # the trash dirs are deleted in the background
+        for _ in range(100):
+            if not trash_dir.exists():
+                break
+            time.sleep(0.1)
+
+        assert not trash_dir.exists()
+        assert task_dir.exists()
+
 
 @pytest.mark.skipif(cvatpt is None, reason="PyTorch dependencies are not installed")
 class TestProjectVisionDataset:
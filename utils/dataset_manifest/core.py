@@ -434,6 +434,18 @@ class _ManifestManager(ABC):
     def __getitem__(self, item):
         return self._parse_line(item)
 
+    def get_items(self, numbers):
+        """ Getting several lines from the manifest file, which is opened once """
+        assert self._index, 'No prepared index'
+        items = []
+        with open(self._manifest.path, 'r') as manifest_file:
+            for number in numbers:
+                manifest_file.seek(self._index[number])
+                parsed_properties = json.loads(manifest_file.readline())
+                self._json_item_is_valid(**parsed_properties)
+                items.append(parsed_properties)
+        return items
+
     @property
     def index(self):
         return self._index